@@ -6,13 +6,21 @@ from schema_inspector import SchemaInspector
 from llm_query_generator import LLMQueryGenerator
 from query_executor import QueryExecutor
 from table_manager import TableManager
+from export_manager import ExportManager
+from import_manager import ImportManager
+from json_provider import ORJSONProvider
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+import gc
+import hashlib
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 # Allow CORS for all domains for MVP, unless running under FastAPI (which handles CORS)
 if not os.environ.get("FASTAPI_MODE"):
     CORS(app) 
@@ -26,6 +34,48 @@ schema_inspector = SchemaInspector()
 llm_generator = LLMQueryGenerator()
 query_executor = QueryExecutor(db_connector)
 table_manager = TableManager(db_connector)
+export_manager = ExportManager(db_connector)
+import_manager = ImportManager(db_connector)
+
+# Blocking SQL from the query/import routes runs on this pool. It stays
+# below the engine pool (Config.POOL_SIZE + MAX_OVERFLOW) so table browsing
+# still gets connections; at most DB_TASK_BACKLOG tasks run or wait.
+DB_TASK_WORKERS = 40
+DB_TASK_BACKLOG = 2 * DB_TASK_WORKERS
+DB_TASK_TIMEOUT = 60
+db_executor = ThreadPoolExecutor(max_workers=DB_TASK_WORKERS, thread_name_prefix="db-task")
+_db_task_slots = threading.BoundedSemaphore(DB_TASK_BACKLOG)
+
+# Error bodies shared with the native FastAPI routes in main.py
+DB_NOT_CONNECTED_ERROR = {
+    "success": False,
+    "error": "Database not connected. Please connect first.",
+    "code": "DB_NOT_CONNECTED"
+}
+DB_BUSY_ERROR = {"success": False, "error": "Server busy, please retry shortly"}
+DB_TIMEOUT_ERROR = {"success": False, "error": "Query timed out"}
+
+def submit_db_task(fn, *args):
+    """Queues blocking DB work on db_executor; None when the backlog is full."""
+    if not _db_task_slots.acquire(blocking=False):
+        return None
+    future = db_executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _db_task_slots.release())
+    return future
+
+def run_db_task(fn, *args, timeout=DB_TASK_TIMEOUT):
+    """
+    Runs blocking DB work on db_executor. Returns (result, error_response);
+    error_response is a 503 when the backlog is full and a 504 when the
+    work outlives the timeout (it still finishes in the background).
+    """
+    future = submit_db_task(fn, *args)
+    if future is None:
+        return None, (jsonify(DB_BUSY_ERROR), 503)
+    try:
+        return future.result(timeout=timeout), None
+    except FutureTimeout:
+        return None, (jsonify(DB_TIMEOUT_ERROR), 504)
 
 from functools import wraps
 
@@ -33,17 +83,27 @@ def require_db_connection(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not db_connector.is_connected():
-            return jsonify({
-                "success": False, 
-                "error": "Database not connected. Please connect first.",
-                "code": "DB_NOT_CONNECTED"
-            }), 401
+            return jsonify(DB_NOT_CONNECTED_ERROR), 401
         return f(*args, **kwargs)
     return decorated_function
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    return jsonify({"status": "ok", "service": "QueryPop Backend"}), 200
+def etag_cached(f):
+    """
+    Tags successful GET responses with a content hash (plus the schema
+    version) and answers 304 Not Modified when the client already has it.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        response = make_response(f(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        digest = hashlib.blake2b(response.get_data(), digest_size=8)
+        digest.update(str(schema_inspector.schema_version).encode())
+        response.set_etag(digest.hexdigest())
+        # Make browsers revalidate instead of reusing a heuristic-fresh copy
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return decorated_function
 
 @app.route('/api/connect', methods=['POST'])
 def connect_db():
@@ -84,6 +144,7 @@ def get_connection_info():
 
 @app.route('/api/databases', methods=['GET'])
 @require_db_connection
+@etag_cached
 def get_databases():
     """Get list of available databases."""
     result = table_manager.get_databases()
@@ -114,6 +175,7 @@ def switch_database():
 
 @app.route('/api/tables', methods=['GET'])
 @require_db_connection
+@etag_cached
 def get_tables():
     """Get list of all tables."""
     result = table_manager.get_tables()
@@ -121,32 +183,22 @@ def get_tables():
         return jsonify(result), 200
     return jsonify(result), 400
 
-@app.route('/api/tables/<table_name>/structure', methods=['GET'])
+@app.route('/api/tables/structures', methods=['GET'])
 @require_db_connection
-def get_table_structure(table_name):
-    """Get structure of a specific table."""
-    result = table_manager.get_table_structure(table_name)
+@etag_cached
+def get_all_table_structures():
+    """Get the structure of every table at once."""
+    result = table_manager.get_all_table_structures()
     if result["success"]:
         return jsonify(result), 200
     return jsonify(result), 400
 
-@app.route('/api/tables/<table_name>/data', methods=['GET'])
+@app.route('/api/tables/<table_name>/structure', methods=['GET'])
 @require_db_connection
-def get_table_data(table_name):
-    """Get paginated data from a table with optional filtering."""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 50, type=int)
-    order_by = request.args.get('order_by', None)
-    order_dir = request.args.get('order_dir', 'asc')
-    
-    # Extract filters from other query parameters
-    filters = {}
-    reserved_params = {'page', 'per_page', 'order_by', 'order_dir', 't'} # 't' is often used for cache busting
-    for key, value in request.args.items():
-        if key not in reserved_params and value:
-            filters[key] = value
-            
-    result = table_manager.get_table_data(table_name, page, per_page, order_by, order_dir, filters)
+@etag_cached
+def get_table_structure(table_name):
+    """Get structure of a specific table."""
+    result = table_manager.get_table_structure(table_name)
     if result["success"]:
         return jsonify(result), 200
     return jsonify(result), 400
@@ -154,12 +206,15 @@ def get_table_data(table_name):
 @app.route('/api/tables/<table_name>/rows', methods=['POST'])
 @require_db_connection
 def insert_row(table_name):
-    """Insert a new row into the table."""
+    """Insert a new row, or a JSON array of rows in bulk, into the table."""
     data = request.json
     if not data:
         return jsonify({"success": False, "error": "Row data required"}), 400
     
-    result = table_manager.insert_row(table_name, data)
+    if isinstance(data, list):
+        result = table_manager.insert_rows(table_name, data)
+    else:
+        result = table_manager.insert_row(table_name, data)
     if result["success"]:
         return jsonify(result), 201
     return jsonify(result), 400
@@ -190,48 +245,24 @@ def delete_row(table_name, pk_value):
         return jsonify(result), 200
     return jsonify(result), 400
 
-# ============ Query Endpoints ============
-
-@app.route('/api/query/generate', methods=['POST'])
+@app.route('/api/tables/batch', methods=['POST'])
 @require_db_connection
-def generate_query():
-    data = request.json
-    question = data.get('question')
-    
-    if not question:
-        return jsonify({"error": "Question required"}), 400
-        
-    schema_summary = schema_inspector.get_schema_summary()
-    if not schema_summary:
-        return jsonify({"error": "No schema found. Connect to DB first."}), 400
-    
-    result = llm_generator.generate_sql(question, schema_summary, db_connector.db_type or "SQL")
-    
-    if result:
-        return jsonify(result), 200
-    else:
-        return jsonify({"error": "Failed to generate SQL"}), 500
-
-@app.route('/api/query/execute', methods=['POST'])
-@require_db_connection
-def execute_query():
-    data = request.json
-    sql = data.get('sql')
-    question = data.get('question', '') # Optional context for logging
-    profile = data.get('profile', False)
-    
-    if not sql:
-        return jsonify({"error": "SQL query required"}), 400
-        
-    result = query_executor.execute_and_log(sql, question, profile=profile)
+def batch_mutate():
+    """Apply a list of row inserts/updates/deletes in one transaction."""
+    ops = (request.json or {}).get('ops')
+    if not ops or not isinstance(ops, list):
+        return jsonify({"success": False, "error": "Operations required"}), 400
     
+    result = table_manager.batch_mutate(ops)
     if result["success"]:
         return jsonify(result), 200
-    else:
-        return jsonify(result), 400
+    return jsonify(result), 400
+
+# ============ Query Endpoints ============
 
 @app.route('/api/query-history', methods=['GET'])
 @require_db_connection
+@etag_cached
 def get_history():
     limit = request.args.get('limit', 20, type=int)
     history = query_executor.get_history(limit)
@@ -243,15 +274,11 @@ def get_history():
 @require_db_connection
 def export_table_csv(table_name):
     """Export table data as CSV."""
-    from export_manager import ExportManager
-    export_manager = ExportManager(db_connector)
-    
-    csv_content, error = export_manager.export_to_csv(table_name)
+    chunks, error = export_manager.stream_csv(table_name)
     if error:
         return jsonify({"success": False, "error": error}), 400
     
-    response = make_response(csv_content)
-    response.headers['Content-Type'] = 'text/csv'
+    response = Response(chunks, content_type='text/csv')
     response.headers['Content-Disposition'] = f'attachment; filename={table_name}.csv'
     return response
 
@@ -259,15 +286,11 @@ def export_table_csv(table_name):
 @require_db_connection
 def export_table_sql(table_name):
     """Export table as SQL."""
-    from export_manager import ExportManager
-    export_manager = ExportManager(db_connector)
-    
-    sql_content, error = export_manager.export_to_sql(table_name)
+    chunks, error = export_manager.stream_sql(table_name)
     if error:
         return jsonify({"success": False, "error": error}), 400
     
-    response = make_response(sql_content)
-    response.headers['Content-Type'] = 'application/sql'
+    response = Response(chunks, content_type='application/sql')
     response.headers['Content-Disposition'] = f'attachment; filename={table_name}.sql'
     return response
 
@@ -275,15 +298,11 @@ def export_table_sql(table_name):
 @require_db_connection
 def export_database():
     """Export entire database as SQL."""
-    from export_manager import ExportManager
-    export_manager = ExportManager(db_connector)
-    
-    sql_content, error = export_manager.export_database_sql()
+    chunks, error = export_manager.stream_database_sql()
     if error:
         return jsonify({"success": False, "error": error}), 400
     
-    response = make_response(sql_content)
-    response.headers['Content-Type'] = 'application/sql'
+    response = Response(chunks, content_type='application/sql')
     response.headers['Content-Disposition'] = 'attachment; filename=database_export.sql'
     return response
 
@@ -293,26 +312,40 @@ def export_database():
 @require_db_connection
 def import_sql():
     """Import SQL file."""
-    from import_manager import ImportManager
-    import_manager = ImportManager(db_connector)
-    
     # Check for file upload
     if 'file' in request.files:
         file = request.files['file']
         if file.filename == '':
             return jsonify({"success": False, "error": "No file selected"}), 400
-        sql_content = file.read().decode('utf-8')
+        # Statements are parsed and executed while the upload is read
+        task, arg = import_manager.import_sql_stream, file.stream
     elif request.json and 'sql' in request.json:
-        sql_content = request.json['sql']
+        task, arg = import_manager.import_sql, request.json['sql']
     else:
         return jsonify({"success": False, "error": "No SQL content provided"}), 400
+
+    # Dumps can take a while; an import is bounded by the backlog, not a deadline
+    result, error_response = run_db_task(task, arg, timeout=None)
+    if error_response:
+        return error_response
     
-    result = import_manager.import_sql(sql_content)
     if result["success"]:
         # Refresh schema cache after import
         schema_inspector.inspect_and_cache_schema(db_connector)
         return jsonify(result), 200
     return jsonify(result), 400
 
+# Everything built above (components, engine machinery, routes) lives for the
+# whole process. Move it to the permanent generation so full collections
+# stop re-scanning it on every request. Skipped when Config.DEBUG is set
+# (app.debug is still False at import time), where a reloader restarts the
+# process on every change anyway.
+if not Config.DEBUG:
+    gc.collect()
+    gc.freeze()
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Several API routes are served natively by main:app, so the dev server
+    # runs that (with reload) rather than this Flask app on its own
+    import uvicorn
+    uvicorn.run("main:app", host='0.0.0.0', port=5000, reload=True)
@@ -0,0 +1,23 @@
+"""
+App DB - Connections to QueryPop's own SQLite database (history, schema cache)
+"""
+import sqlite3
+
+# Set once per connection. WAL lets readers run alongside the writer and
+# makes synchronous=NORMAL (no fsync per commit) safe.
+_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-30000;
+"""
+
+
+def connect(path):
+    """
+    Opens a long-lived connection with the app PRAGMAs applied. It may be
+    shared across threads; callers serialize access with their own lock.
+    """
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript(_PRAGMAS)
+    return conn
@@ -7,11 +7,24 @@ class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     # For Ollama, we might need a base URL
     OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3")
     # LLM Provider: "openai" or "ollama"
     LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
     
+    # Development mode (e.g. alongside uvicorn --reload); skips production
+    # only tuning such as freezing startup objects out of the GC
+    DEBUG = os.getenv("DEBUG", "").lower() in ("1", "true", "yes")
+
     # Random secret key for Flask sessions (if needed, though MVP might not use sessions deeply)
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
     
+    # Connection pool for the user's database. It serves Flask routes, the
+    # WebSocket streamer and the DB task executor at once, so it's sized well
+    # above SQLAlchemy's 5+10 default. Recycle ahead of server idle timeouts.
+    POOL_SIZE = int(os.getenv("POOL_SIZE", "20"))
+    MAX_OVERFLOW = int(os.getenv("MAX_OVERFLOW", "30"))
+    POOL_RECYCLE = int(os.getenv("POOL_RECYCLE", "1800"))
+    POOL_TIMEOUT = int(os.getenv("POOL_TIMEOUT", "30"))
+
     # SQLite DB for app data (history, schema cache)
     APP_DB_PATH = os.path.join(os.getcwd(), "..", "data", "app.db")
@@ -1,14 +1,56 @@
+import re
+import time
+from contextlib import contextmanager
 from sqlalchemy import create_engine, text, inspect
+from sqlalchemy.engine.url import make_url
 from sqlalchemy.exc import SQLAlchemyError
+from config import Config
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# (accepted prefix, db_type, SQLAlchemy driver prefix)
+_CONN_PREFIX_MAP = (
+    # Use pymysql instead of mysql-connector-python to avoid corruption issues
+    ("mysql://", "mysql", "mysql+pymysql://"),
+    # SQLAlchemy 1.4+ prefers postgresql://
+    ("postgres://", "postgresql", "postgresql://"),
+    ("postgresql://", "postgresql", "postgresql://"),
+)
+
+# Fixed statements are built once rather than per call
+_PROFILING_ON_SQL = text("SET PROFILING = 1")
+_PROFILING_OFF_SQL = text("SET PROFILING = 0")
+_SHOW_PROFILE_SQL = text("SHOW PROFILE")
+
+# Statements that may run on a server-side cursor. Postgres only DECLAREs
+# cursors for queries, so EXPLAIN / SHOW are fetched the ordinary way.
+_STREAMABLE_RE = re.compile(r'\s*(?:SELECT|WITH)\b', re.I)
+# Rows per fetch from a server-side cursor
+STREAM_FETCH_ROWS = 1000
+
+# Seconds a cached table-name list stays fresh
+TABLE_NAMES_TTL = 30
+
+# Backoff after failed connects to the same string: 1s, 2s, 4s ... up to 30s
+CONNECT_BACKOFF_BASE = 1.0
+CONNECT_BACKOFF_MAX = 30.0
+
 class DBConnector:
     def __init__(self):
         self.engine = None
         self.connection_string = None
         self.db_type = None # 'mysql' or 'postgresql'
+        self._url = None # parsed connection_string
+        # (connection string, consecutive failures, monotonic retry-after)
+        self._last_failure = None
+        # Reflection caches for the current engine, see clear_schema_cache
+        self._inspector = None
+        self._table_names = None # (names, monotonic fetch time)
+        self._table_keys = {} # table name -> pk columns, None if no such table
+        # Bumped by clear_schema_cache; lets other components key their own
+        # schema caches on it
+        self.schema_generation = 0
 
     def switch_database(self, db_name):
         """Switches the active connection to a different database."""
@@ -16,13 +58,8 @@ class DBConnector:
              return False, "No active connection"
         
         try:
-            from sqlalchemy.engine.url import make_url
-            
-            # Parse current URL
-            url = make_url(self.connection_string)
-            
-            # Update database
-            new_url = url.set(database=db_name)
+            # Update database on the URL parsed at connect time
+            new_url = self._url.set(database=db_name)
             
             # Connect with new URL (explicitly reveal password for connection string)
             success, msg = self.connect(new_url.render_as_string(hide_password=False))
@@ -54,45 +91,62 @@ class DBConnector:
                 logger.warning("Found null bytes in connection string! removing them.")
                 
             connection_string = connection_string.replace('\x00', '').strip()
+
+            # Don't hammer an endpoint that just failed
+            wait = self._backoff_remaining(connection_string)
+            if wait > 0:
+                return False, f"Connection failed recently. Retry in {wait:.0f}s."
             
             # Basic validation of string format
-            db_type = None
-            processed_conn_string = connection_string
-            
-            if connection_string.startswith("mysql://"):
-                db_type = "mysql"
-                # Use pymysql instead of mysql-connector-python to avoid corruption issues
-                processed_conn_string = connection_string.replace("mysql://", "mysql+pymysql://", 1)
-            elif connection_string.startswith("postgres://") or connection_string.startswith("postgresql://"):
-                db_type = "postgresql"
-                if connection_string.startswith("postgres://"):
-                    # SQLAlchemy 1.4+ prefers postgresql://
-                    processed_conn_string = connection_string.replace("postgres://", "postgresql://", 1)
+            for prefix, db_type, driver_prefix in _CONN_PREFIX_MAP:
+                if connection_string.startswith(prefix):
+                    processed_conn_string = driver_prefix + connection_string[len(prefix):]
+                    break
             else:
                 return False, "Unsupported database type. Use mysql:// or postgresql://"
 
-            # DEBUG: Print the processed connection string (careful with secrets)
-            safe_conn_string = processed_conn_string
-            if "@" in safe_conn_string:
-                part1, part2 = safe_conn_string.rsplit("@", 1)
-                if ":" in part1:
-                    # mask password
-                    scheme_user, _ = part1.rsplit(":", 1)
-                    safe_conn_string = f"{scheme_user}:***@{part2}"
-            logger.info(f"DEBUG: Connecting with: {safe_conn_string}")
+            # Parse once; the engine, the masked log line and later
+            # switch_database/get_connection_details calls all reuse it
+            url = make_url(processed_conn_string)
+            logger.info(f"DEBUG: Connecting with: {url.render_as_string(hide_password=True)}")
 
             # Create engine. echo=False to avoid spamming logs with SQL
-            # pool_pre_ping=True helps detect stale connections
-            engine = create_engine(processed_conn_string, echo=False, pool_pre_ping=True)
+            # Pool sizing comes from Config (env overridable). pool_pre_ping
+            # stays on: recycle only covers idle timeouts, not server restarts.
+            # LIFO keeps a few warm connections busy and lets the rest idle out.
+            connect_args = {}
+            if db_type == "mysql":
+                connect_args["charset"] = "utf8mb4"
+            engine = create_engine(
+                url,
+                echo=False,
+                pool_size=Config.POOL_SIZE,
+                max_overflow=Config.MAX_OVERFLOW,
+                pool_recycle=Config.POOL_RECYCLE,
+                pool_timeout=Config.POOL_TIMEOUT,
+                pool_pre_ping=True,
+                pool_use_lifo=True,
+                # LRU of compiled statements shared by every connection;
+                # roomier than the default 500 since table browsing mints a
+                # statement per (table, filter, sort) combination
+                query_cache_size=1200,
+                connect_args=connect_args
+            )
             
-            # Test connection
-            with engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            # Test connection. Opening it already proves host, credentials
+            # and database; a SELECT 1 on top would only add a round trip.
+            # The connection stays pooled for the schema inspection that
+            # follows (pre-ping covers it from then on).
+            with engine.connect():
+                pass
             
             # Only update state if successful
             self.engine = engine
             self.connection_string = connection_string
             self.db_type = db_type
+            self._url = make_url(connection_string)
+            self._last_failure = None
+            self.clear_schema_cache()
             
             logger.info(f"Successfully connected to {self.db_type} DB")
             return True, "Connected successfully"
@@ -100,6 +154,7 @@ class DBConnector:
         except SQLAlchemyError as e:
             error_msg = str(e)
             logger.error(f"Connection failed: {error_msg}")
+            self._record_failure(connection_string)
             
             # Check for common MySQL connection errors
             if "2003" in error_msg and "timed out" in error_msg:
@@ -113,13 +168,28 @@ class DBConnector:
         except Exception as e:
             logger.exception("Detailed Connection Error Traceback:") # This prints the full stack trace
             error_msg = str(e)
+            self._record_failure(connection_string)
+            return False, f"Unexpected error: {error_msg}"
+
+    def _backoff_remaining(self, connection_string):
+        """Seconds left before connection_string may be tried again."""
+        if not self._last_failure or self._last_failure[0] != connection_string:
+            return 0
+        return self._last_failure[2] - time.monotonic()
+
+    def _record_failure(self, connection_string):
+        failures = 1
+        if self._last_failure and self._last_failure[0] == connection_string:
+            failures = self._last_failure[1] + 1
+        delay = min(CONNECT_BACKOFF_BASE * 2 ** (failures - 1), CONNECT_BACKOFF_MAX)
+        self._last_failure = (connection_string, failures, time.monotonic() + delay)
+
     def get_connection_details(self):
         """Returns safe connection details (host, user, db, type)."""
         if not self.connection_string:
             return None
         try:
-            from sqlalchemy.engine.url import make_url
-            url = make_url(self.connection_string)
+            url = self._url
             return {
                 "type": self.db_type,
                 "host": url.host,
@@ -131,67 +201,143 @@ class DBConnector:
             logger.error(f"Failed to parse connection string: {e}")
             return None
 
+    @contextmanager
+    def get_conn(self):
+        """Checks out a connection from the shared engine pool."""
+        if not self.engine:
+            raise Exception("Not connected to database")
+        with self.engine.connect() as conn:
+            yield conn
+
+    def clear_schema_cache(self):
+        """Drops cached reflection; needed after the schema changes."""
+        self._inspector = None
+        self._table_names = None
+        self._table_keys = {}
+        self.schema_generation += 1
+
     def get_inspector(self):
+        """
+        Returns a shared Inspector. It memoizes what it reflects until
+        clear_schema_cache is called.
+        """
+        if not self.engine:
+            raise Exception("Not connected to any database")
+        inspector = self._inspector
+        if inspector is None:
+            inspector = self._inspector = inspect(self.engine)
+        return inspector
+
+    def get_table_names(self, ttl=TABLE_NAMES_TTL):
+        """Table names of the current database, re-read after ttl seconds."""
         if not self.engine:
             raise Exception("Not connected to any database")
-        return inspect(self.engine)
+        cached = self._table_names
+        now = time.monotonic()
+        if cached and now - cached[1] < ttl:
+            return cached[0]
+        # A throwaway inspector, the shared one would never refresh
+        names = inspect(self.engine).get_table_names()
+        self._table_names = (names, now)
+        return names
 
-    def execute_query(self, sql_query, profile=False):
+    def get_primary_keys(self, table_name):
+        """
+        Primary key columns of table_name ([] if it has none), or None if
+        there is no such table. Cached until clear_schema_cache; this is the
+        one primary key lookup the other components use.
+        """
+        try:
+            return self._table_keys[table_name]
+        except KeyError:
+            pass
+        inspector = self.get_inspector()
+        keys = None
+        if inspector.has_table(table_name):
+            pk_constraint = inspector.get_pk_constraint(table_name)
+            keys = (pk_constraint or {}).get("constrained_columns") or []
+        self._table_keys[table_name] = keys
+        return keys
+
+    def get_key_column(self, table_name):
+        """
+        Name of table_name's single-column primary key, or None (also when
+        the key can't be read). Served from the get_primary_keys cache.
+        """
+        try:
+            keys = self.get_primary_keys(table_name)
+        except Exception as e:
+            logger.warning(f"Could not read primary key of {table_name}: {e}")
+            return None
+        return keys[0] if keys and len(keys) == 1 else None
+
+    def execute_query(self, sql_query, profile=False, columnar=False):
         """
         Executes a raw SQL query and returns results.
         Should only be called after safety validation.
+        With columnar=True rows are value arrays ordered like "columns"
+        instead of one dict per row.
         """
         if not self.engine:
             raise Exception("Not connected to database")
             
         try:
-            with self.engine.connect() as conn:
+            with self.get_conn() as conn:
                 # Enable profiling if requested (MySQL only)
                 profiling_enabled = False
                 if profile and self.db_type == "mysql":
                     try:
-                        conn.execute(text("SET PROFILING = 1"))
+                        conn.execute(_PROFILING_ON_SQL)
                         profiling_enabled = True
                     except Exception as e:
                         logger.warning(f"Failed to enable profiling: {e}")
                         profiling_enabled = False
 
-                # Use stream_results for large datasets if needed, but MVP limits rows
+                # Stream queries through a server-side cursor so the driver
+                # doesn't buffer the whole result set on top of the rows
+                # built here
+                if _STREAMABLE_RE.match(sql_query):
+                    conn = conn.execution_options(stream_results=True, yield_per=STREAM_FETCH_ROWS)
                 result = conn.execute(text(sql_query))
                 
+                # Check if query returns rows (SELECT)
+                # Rows are drained before anything else runs on this
+                # connection: an unread server-side cursor blocks it.
+                if result.returns_rows:
+                    columns = list(result.keys())
+                    rows = []
+                    for partition in result.partitions():
+                        if columnar:
+                            rows.extend(map(tuple, partition))
+                        else:
+                            # _asdict() reads the result's shared key map
+                            # instead of zipping a column list per row
+                            rows.extend(row._asdict() for row in partition)
+                    row_count = len(rows)
+                else:
+                    # Non-SELECT queries (though validation should prevent these)
+                    columns = []
+                    rows = []
+                    row_count = result.rowcount
+                
                 profile_stats = []
                 if profiling_enabled:
                     try:
-                        profile_res = conn.execute(text("SHOW PROFILE"))
-                        # Use keys() to get column names
-                        profile_columns = list(profile_res.keys())
-                        profile_stats = [dict(zip(profile_columns, row)) for row in profile_res.fetchall()]
+                        profile_res = conn.execute(_SHOW_PROFILE_SQL)
+                        profile_stats = [row._asdict() for row in profile_res]
                         logger.info(f"Fetched {len(profile_stats)} profiling records.")
                         # Disable profiling to be clean
-                        conn.execute(text("SET PROFILING = 0"))
+                        conn.execute(_PROFILING_OFF_SQL)
                     except Exception as e:
                         logger.warning(f"Failed to fetch profile stats: {e}")
                 
-                # Check if query returns rows (SELECT)
-                if result.returns_rows:
-                    columns = list(result.keys())
-                    rows = [dict(zip(columns, row)) for row in result.fetchall()]
-                    return {
-                        "success": True,
-                        "columns": columns,
-                        "rows": rows,
-                        "row_count": len(rows),
-                        "profile_stats": profile_stats
-                    }
-                else:
-                    # Non-SELECT queries (though validation should prevent these)
-                    return {
-                        "success": True,
-                        "columns": [],
-                        "rows": [],
-                        "row_count": result.rowcount,
-                        "profile_stats": profile_stats
-                    }
+                return {
+                    "success": True,
+                    "columns": columns,
+                    "rows": rows,
+                    "row_count": row_count,
+                    "profile_stats": profile_stats
+                }
         except SQLAlchemyError as e:
             logger.error(f"Query execution error: {str(e)}")
             return {"success": False, "error": str(e)}
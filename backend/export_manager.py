@@ -2,132 +2,325 @@
 Export Manager - Export table data to various formats
 """
 import csv
+import functools
 import io
+import itertools
+import json
+from contextlib import contextmanager
+from psycopg2.extensions import adapt
 from sqlalchemy import text
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Rows pulled from the server-side cursor per round-trip while streaming
+STREAM_CHUNK_ROWS = 10000
+
+# Rows per multi-row INSERT in SQL exports
+INSERT_BATCH_ROWS = 500
+
+
+def _drain(buffer):
+    """Returns the text written to a StringIO so far and empties it."""
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+    return value
+
+
+# Values the driver hands back already decoded from JSON columns
+_JSON_TYPES = (dict, list)
+
+
+def _plain_row(row):
+    """Returns row with decoded JSON values serialized back to JSON text."""
+    if not any(isinstance(val, _JSON_TYPES) for val in row):
+        return row
+    return tuple(json.dumps(val) if isinstance(val, _JSON_TYPES) else val for val in row)
+
+
+def _sql_literal(val):
+    """Renders a Python value as a SQL literal for INSERT statements."""
+    if val is None:
+        return "NULL"
+    elif isinstance(val, str):
+        escaped = val.replace("'", "''")
+        return f"'{escaped}'"
+    elif isinstance(val, (int, float)):
+        return str(val)
+    elif isinstance(val, (bytes, memoryview)):
+        return f"X'{bytes(val).hex()}'"
+    elif isinstance(val, _JSON_TYPES):
+        return _sql_literal(json.dumps(val))
+    else:
+        escaped = str(val).replace("'", "''")
+        return f"'{escaped}'"
+
+
+@functools.lru_cache(maxsize=256)
+def _select_all_sql(quoted_table):
+    """
+    Untyped SELECT * for an already quoted table name. Plain text keeps
+    column values as the driver returns them, without type processing.
+    """
+    return text(f"SELECT * FROM {quoted_table}")
+
+
+@functools.lru_cache(maxsize=256)
+def _show_create_table_sql(table_name):
+    """SHOW CREATE TABLE statement for a table, built once per name."""
+    quoted = table_name.replace("`", "``")
+    return text(f"SHOW CREATE TABLE `{quoted}`")
+
+
+def _row_renderer(conn):
+    """
+    Returns a function rendering a row as a "(v1, v2, ...)" SQL tuple,
+    escaped by the connection's driver when it can do so itself.
+    Decoded JSON values are rendered as JSON text; neither driver escapes
+    dicts or lists as a column value.
+    """
+    dbapi_conn = conn.connection.dbapi_connection
+    driver = conn.dialect.driver
+
+    if driver == "pymysql":
+        # escape() renders a whole sequence in one call
+        return lambda row: dbapi_conn.escape(tuple(_plain_row(row)))
+
+    if driver == "psycopg2":
+        def render(row):
+            adapted = adapt(tuple(_plain_row(row)))
+            adapted.prepare(dbapi_conn)
+            return adapted.getquoted().decode()
+        return render
+
+    return lambda row: "(" + ", ".join(_sql_literal(val) for val in row) + ")"
+
 
 class ExportManager:
     def __init__(self, db_connector):
         self.db_connector = db_connector
 
-    def export_to_csv(self, table_name):
-        """Export table data to CSV format."""
+    def _check_table(self, table_name):
+        """Raises ValueError unless table_name is an existing table."""
+        if table_name in self.db_connector.get_table_names():
+            return
+        # The cached list may predate the table; re-read once before rejecting
+        if table_name not in self.db_connector.get_table_names(ttl=0):
+            raise ValueError(f"Unknown table: {table_name}")
+
+    def _select_all(self, conn, table_name):
+        """SELECT * for a table, quoted for the connection's dialect."""
+        return _select_all_sql(conn.dialect.identifier_preparer.quote_identifier(table_name))
+
+    @contextmanager
+    def _connection(self, conn=None):
+        """
+        Yields conn when the caller already holds one, otherwise checks one
+        out for the duration of the block. Connections passed in are left
+        open for the caller.
+        """
+        if conn is not None:
+            yield conn
+            return
+        with self.db_connector.get_conn() as conn:
+            yield conn
+
+    def _start_stream(self, chunks):
+        """
+        Runs a chunk generator up to its first chunk so connection and query
+        errors surface before a response has started.
+        Returns (chunks, error).
+        """
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return iter(()), None
+        except Exception as e:
+            return None, str(e)
+        return itertools.chain([first], chunks), None
+
+    def stream_csv(self, table_name, conn=None):
+        """
+        Export table data as CSV, streamed from a server-side cursor.
+        Runs on conn if given, else on a pooled connection of its own.
+        Returns (chunks, error) where chunks is an iterator of CSV text.
+        """
         if not self.db_connector.engine:
             return None, "Not connected to database"
 
         try:
-            query = f"SELECT * FROM `{table_name}`"
-            
-            with self.db_connector.engine.connect() as conn:
-                result = conn.execute(text(query))
-                columns = list(result.keys())
-                rows = result.fetchall()
-            
-            # Create CSV in memory
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
+            self._check_table(table_name)
+        except Exception as e:
+            return None, str(e)
+
+        chunks, error = self._start_stream(self._iter_csv(table_name, conn))
+        if error:
+            logger.error(f"CSV export failed: {error}")
+        return chunks, error
+
+    def _iter_csv(self, table_name, conn=None):
+        output = io.StringIO()
+        writer = csv.writer(output)
+
+        with self._connection(conn) as conn:
+            result = conn.execution_options(
+                stream_results=True, yield_per=STREAM_CHUNK_ROWS
+            ).execute(self._select_all(conn, table_name))
+
             # Write header
-            writer.writerow(columns)
-            
-            # Write data rows
-            for row in rows:
-                writer.writerow(row)
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            return csv_content, None
-            
+            writer.writerow(result.keys())
+            yield _drain(output)
+
+            # Write data rows, one chunk per fetched partition
+            for partition in result.partitions():
+                writer.writerows(map(_plain_row, partition))
+                yield _drain(output)
+
+    def export_to_csv(self, table_name, conn=None):
+        """Export table data to CSV format."""
+        chunks, error = self.stream_csv(table_name, conn)
+        if error:
+            return None, error
+
+        try:
+            return "".join(chunks), None
         except Exception as e:
             logger.error(f"CSV export failed: {e}")
             return None, str(e)
 
-    def export_to_sql(self, table_name, include_structure=True):
-        """Export table to SQL INSERT statements."""
+    def stream_sql(self, table_name, include_structure=True, conn=None):
+        """
+        Export table to SQL INSERT statements, streamed from a server-side cursor.
+        Runs on conn if given, else on a pooled connection of its own.
+        Returns (chunks, error) where chunks is an iterator of SQL text.
+        """
         if not self.db_connector.engine:
             return None, "Not connected to database"
 
         try:
-            sql_statements = []
-            
-            # Get table structure if requested
-            if include_structure:
-                # For MySQL, get CREATE TABLE statement
-                try:
-                    with self.db_connector.engine.connect() as conn:
-                        result = conn.execute(text(f"SHOW CREATE TABLE `{table_name}`"))
-                        row = result.fetchone()
-                        if row:
-                            create_stmt = row[1] if len(row) > 1 else row[0]
-                            sql_statements.append(f"-- Table structure for `{table_name}`")
-                            sql_statements.append(f"DROP TABLE IF EXISTS `{table_name}`;")
-                            sql_statements.append(create_stmt + ";")
-                            sql_statements.append("")
-                except Exception as e:
-                    logger.warning(f"Could not get CREATE TABLE: {e}")
-            
-            # Get data
-            query = f"SELECT * FROM `{table_name}`"
-            
-            with self.db_connector.engine.connect() as conn:
-                result = conn.execute(text(query))
-                columns = list(result.keys())
-                rows = result.fetchall()
-            
-            if rows:
-                sql_statements.append(f"-- Data for `{table_name}`")
-                
-                for row in rows:
-                    values = []
-                    for val in row:
-                        if val is None:
-                            values.append("NULL")
-                        elif isinstance(val, str):
-                            escaped = val.replace("'", "''")
-                            values.append(f"'{escaped}'")
-                        elif isinstance(val, (int, float)):
-                            values.append(str(val))
-                        else:
-                            escaped = str(val).replace("'", "''")
-                            values.append(f"'{escaped}'")
-                    
-                    cols_str = ", ".join([f"`{c}`" for c in columns])
-                    vals_str = ", ".join(values)
-                    sql_statements.append(f"INSERT INTO `{table_name}` ({cols_str}) VALUES ({vals_str});")
-            
-            return "\n".join(sql_statements), None
-            
+            self._check_table(table_name)
+        except Exception as e:
+            return None, str(e)
+
+        chunks, error = self._start_stream(self._iter_sql(table_name, include_structure, conn))
+        if error:
+            logger.error(f"SQL export failed: {error}")
+        return chunks, error
+
+    def _iter_sql(self, table_name, include_structure=True, conn=None):
+        # Structure and data share one connection; callers exporting many
+        # tables pass theirs in
+        with self._connection(conn) as conn:
+            yield from self._iter_table_sql(conn, table_name, include_structure)
+
+    def _iter_table_sql(self, conn, table_name, include_structure):
+        # Get table structure if requested
+        # SHOW CREATE TABLE is MySQL only; elsewhere it would just fail (and
+        # on Postgres abort the shared connection's transaction)
+        if include_structure and self.db_connector.db_type == "mysql":
+            create_stmt = None
+            try:
+                row = conn.execute(_show_create_table_sql(table_name)).first()
+                if row:
+                    create_stmt = row[1] if len(row) > 1 else row[0]
+            except Exception as e:
+                logger.warning(f"Could not get CREATE TABLE: {e}")
+
+            if create_stmt:
+                yield (
+                    f"-- Table structure for `{table_name}`\n"
+                    f"DROP TABLE IF EXISTS `{table_name}`;\n"
+                    f"{create_stmt};\n\n"
+                )
+
+        # Get data
+        # Closing the result drains an abandoned server-side cursor so the
+        # connection stays usable for the next table
+        with conn.execution_options(
+            stream_results=True, yield_per=STREAM_CHUNK_ROWS
+        ).execute(self._select_all(conn, table_name)) as result:
+            quote = conn.dialect.identifier_preparer.quote_identifier
+            cols_str = ", ".join(quote(c) for c in result.keys())
+            insert_prefix = f"INSERT INTO {quote(table_name)} ({cols_str}) VALUES "
+            render_row = _row_renderer(conn)
+
+            first = True
+            for partition in result.partitions():
+                statements = []
+                if first:
+                    statements.append(f"-- Data for `{table_name}`")
+                    first = False
+
+                for start in range(0, len(partition), INSERT_BATCH_ROWS):
+                    values = ", ".join(map(render_row, partition[start:start + INSERT_BATCH_ROWS]))
+                    statements.append(f"{insert_prefix}{values};")
+
+                yield "\n".join(statements) + "\n"
+
+    def export_to_sql(self, table_name, include_structure=True, conn=None):
+        """Export table to SQL INSERT statements."""
+        chunks, error = self.stream_sql(table_name, include_structure, conn)
+        if error:
+            return None, error
+
+        try:
+            return "".join(chunks), None
         except Exception as e:
             logger.error(f"SQL export failed: {e}")
             return None, str(e)
 
-    def export_database_sql(self):
-        """Export all tables to SQL format."""
+    def stream_database_sql(self, conn=None):
+        """
+        Export all tables to SQL format, one table after another, all on
+        conn if given, else on a single pooled connection.
+        Returns (chunks, error) where chunks is an iterator of SQL text.
+        """
         if not self.db_connector.engine:
             return None, "Not connected to database"
 
-        try:
-            from sqlalchemy import inspect
-            inspector = inspect(self.db_connector.engine)
-            tables = inspector.get_table_names()
-            
-            all_sql = []
-            all_sql.append("-- QueryPop Database Export")
-            all_sql.append(f"-- Tables: {len(tables)}")
-            all_sql.append("")
-            
+        chunks, error = self._start_stream(self._iter_database_sql(conn))
+        if error:
+            logger.error(f"Database export failed: {error}")
+        return chunks, error
+
+    def _iter_database_sql(self, conn=None):
+        tables = self.db_connector.get_table_names()
+
+        yield (
+            "-- QueryPop Database Export\n"
+            f"-- Tables: {len(tables)}\n\n"
+        )
+
+        # One connection (and one transaction, so on MySQL one consistent
+        # snapshot) for the whole dump instead of two checkouts per table
+        with self._connection(conn) as conn:
             for table in tables:
-                sql_content, error = self.export_to_sql(table, include_structure=True)
-                if sql_content:
-                    all_sql.append(sql_content)
-                    all_sql.append("")
-            
-            return "\n".join(all_sql), None
-            
+                # A table that fails before any of its SQL is written is
+                # skipped with a marker; once its DROP/CREATE or data is out,
+                # a failure would leave it truncated, so the dump is aborted
+                started = False
+                try:
+                    for chunk in self._iter_table_sql(conn, table, include_structure=True):
+                        started = True
+                        yield chunk
+                    yield "\n"
+                except Exception as e:
+                    if started:
+                        logger.error(f"Database export aborted in table {table}: {e}")
+                        yield f"\n-- ERROR: export aborted in table `{table}`: {e}\n"
+                        raise
+                    logger.warning(f"Skipping table {table} in database export: {e}")
+                    yield f"-- ERROR: table `{table}` skipped: {e}\n\n"
+
+    def export_database_sql(self, conn=None):
+        """Export all tables to SQL format."""
+        chunks, error = self.stream_database_sql(conn)
+        if error:
+            return None, error
+
+        try:
+            return "".join(chunks), None
         except Exception as e:
             logger.error(f"Database export failed: {e}")
             return None, str(e)
@@ -1,11 +1,46 @@
 """
 Import Manager - Import SQL files into the database
 """
+import codecs
+import re
 from sqlalchemy import text
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# The complete tokens of a statement, up to its terminating ';'. Strings,
+# quoted identifiers and comments are consumed whole so a ';' inside them
+# doesn't end the statement. The match stops at the ';', at a token that
+# isn't finished yet, or at a '-' / '/' ending the text (the next chunk may
+# make it a comment), so scanning can resume there once more text arrives.
+# Possessive quantifiers keep it linear instead of backtracking.
+_TOKENS_RE = re.compile(r"""
+    (?:
+        [^;'"`/\-]++                    # plain SQL
+      | '(?:[^'\\]++|\\.)*+'            # 'string' with backslash escapes
+      | "(?:[^"\\]++|\\.)*+"            # "string" or "identifier"
+      | `[^`]*+`                        # `identifier`
+      | --[^\n]*+\n                     # line comment
+      | /\*.*?\*/                       # block comment
+      | /(?!\*|\Z) | -(?!-|\Z)          # division / minus
+    )*+
+""", re.S | re.X)
+
+# Consecutive INSERTs with the same "INSERT INTO t (cols) VALUES" prefix are
+# merged into one multi-row INSERT of at most this many statements / bytes
+IMPORT_BATCH_STATEMENTS = 500
+IMPORT_BATCH_BYTES = 1024 * 1024
+
+_INSERT_PREFIX_RE = re.compile(
+    r"INSERT\s+(?:IGNORE\s+)?INTO\s+[^\s(]+\s*(?:\([^)]*\)\s*)?VALUES\s*(?=\()", re.I
+)
+# Clauses after the VALUES list (upserts, RETURNING) make an INSERT unmergeable
+_INSERT_TAIL_CLAUSE_RE = re.compile(r"\)\s*(?:ON|AS|RETURNING)\b", re.I)
+
+# Comments and whitespace ahead of a statement. MySQL /*! ... */ version
+# comments are executable and stay.
+_LEADING_COMMENTS_RE = re.compile(r"(?:\s++|--[^\n]*+|/\*(?!!).*?\*/)*+", re.S)
+
 
 class ImportManager:
     def __init__(self, db_connector):
@@ -13,29 +48,57 @@ class ImportManager:
 
     def import_sql(self, sql_content):
         """Import SQL statements into the database."""
+        return self._execute_statements(self._iter_sql_statements([sql_content]))
+
+    def import_sql_stream(self, stream, encoding='utf-8'):
+        """
+        Import SQL statements from a binary file-like object (e.g. an upload).
+        The dump is decoded and split line by line while statements execute,
+        so it is never held in memory as a whole.
+        """
+        return self._execute_statements(
+            self._iter_sql_statements(codecs.iterdecode(stream, encoding))
+        )
+
+    def _execute_statements(self, statements):
+        """Execute an iterable of statements in one transaction."""
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
 
         try:
-            # Split SQL content into individual statements
-            statements = self._parse_sql_statements(sql_content)
-            
             executed = 0
             errors = []
+            batch_prefix = None
+            batch = []
+            batch_bytes = 0
             
-            with self.db_connector.engine.connect() as conn:
+            with self.db_connector.get_conn() as conn:
+                # Dump statements run once; keep them out of the engine's
+                # compiled statement cache
+                conn = conn.execution_options(compiled_cache=None)
+
                 for stmt in statements:
                     stmt = stmt.strip()
                     if not stmt or stmt.startswith('--'):
                         continue
-                    
-                    try:
-                        conn.execute(text(stmt))
-                        executed += 1
-                    except Exception as e:
-                        error_msg = f"Error executing: {stmt[:50]}... - {str(e)}"
-                        errors.append(error_msg)
-                        logger.warning(error_msg)
+
+                    prefix, values = self._split_insert(stmt)
+                    if batch and (prefix != batch_prefix
+                                  or len(batch) >= IMPORT_BATCH_STATEMENTS
+                                  or batch_bytes >= IMPORT_BATCH_BYTES):
+                        executed += self._execute_insert_batch(conn, batch_prefix, batch, errors)
+                        batch = []
+                        batch_bytes = 0
+
+                    if prefix is None:
+                        executed += self._execute_one(conn, stmt, errors)
+                    else:
+                        batch_prefix = prefix
+                        batch.append((stmt, values))
+                        batch_bytes += len(values)
+
+                if batch:
+                    executed += self._execute_insert_batch(conn, batch_prefix, batch, errors)
                 
                 conn.commit()
             
@@ -55,49 +118,86 @@ class ImportManager:
             logger.error(f"SQL import failed: {e}")
             return {"success": False, "error": str(e)}
 
-    def _parse_sql_statements(self, sql_content):
-        """Parse SQL content into individual statements."""
-        statements = []
-        current_statement = []
-        in_string = False
-        string_char = None
-        
-        for line in sql_content.split('\n'):
-            line = line.strip()
-            
-            # Skip empty lines and comments
-            if not line or line.startswith('--'):
+    def _split_insert(self, stmt):
+        """
+        Splits a mergeable INSERT into (prefix, values list).
+        Returns (None, None) for any other statement.
+        """
+        match = _INSERT_PREFIX_RE.match(stmt)
+        if not match:
+            return None, None
+        values = stmt[match.end():].rstrip(';').rstrip()
+        if not values.endswith(')') or _INSERT_TAIL_CLAUSE_RE.search(values):
+            return None, None
+        # Normalize the prefix so formatting differences don't split batches
+        return " ".join(match.group().split()), values
+
+    def _execute_one(self, conn, stmt, errors):
+        """Executes a single statement, recording a failure in errors."""
+        try:
+            conn.execute(text(stmt))
+            return 1
+        except Exception as e:
+            error_msg = f"Error executing: {stmt[:50]}... - {str(e)}"
+            errors.append(error_msg)
+            logger.warning(error_msg)
+            return 0
+
+    def _execute_insert_batch(self, conn, prefix, batch, errors):
+        """
+        Executes a run of INSERTs as one multi-row INSERT. If that fails, it
+        is rolled back to a savepoint and the statements are replayed one by
+        one so each bad row is reported as before.
+        """
+        if len(batch) == 1:
+            return self._execute_one(conn, batch[0][0], errors)
+
+        merged = prefix + " " + ", ".join(values for _, values in batch)
+        try:
+            with conn.begin_nested():
+                conn.execute(text(merged))
+            return len(batch)
+        except Exception as e:
+            logger.info(f"Batched INSERT failed, replaying {len(batch)} statements: {e}")
+        return sum(self._execute_one(conn, stmt, errors) for stmt, _ in batch)
+
+    def _iter_sql_statements(self, chunks):
+        """
+        Yield individual statements from an iterable of SQL text chunks
+        (lines of a file, or the whole dump at once).
+        """
+        parts = []    # scanned text of the statement in progress
+        pending = []  # text not scanned yet, from an unfinished token on
+        for chunk in chunks:
+            pending.append(chunk)
+            # Nothing can have finished without a ';'
+            if ';' not in chunk:
                 continue
-            
-            i = 0
-            while i < len(line):
-                char = line[i]
-                
-                # Handle string literals
-                if char in ("'", '"') and (i == 0 or line[i-1] != '\\'):
-                    if not in_string:
-                        in_string = True
-                        string_char = char
-                    elif char == string_char:
-                        in_string = False
-                
-                # Check for statement end
-                if char == ';' and not in_string:
-                    current_statement.append(line[:i+1])
-                    statements.append(' '.join(current_statement))
-                    current_statement = []
-                    line = line[i+1:].strip()
-                    i = -1
-                
-                i += 1
-            
-            if line:
-                current_statement.append(line)
-        
-        # Add any remaining statement
-        if current_statement:
-            remaining = ' '.join(current_statement).strip()
-            if remaining:
-                statements.append(remaining)
-        
-        return statements
+
+            # Scanning resumes where the last pass stopped: only an
+            # unfinished token (e.g. an open string) is read twice, never
+            # the statement so far
+            data = "".join(pending)
+            start = pos = 0
+            while True:
+                pos = _TOKENS_RE.match(data, pos).end()
+                if pos == len(data) or data[pos] != ';':
+                    break
+                pos += 1
+                parts.append(data[start:pos])
+                statement = self._strip_leading_comments("".join(parts))
+                parts = []
+                start = pos
+                if statement != ';':
+                    yield statement
+            parts.append(data[start:pos])
+            pending = [data[pos:]]
+
+        # Whatever is left had no terminating ';'
+        remaining = self._strip_leading_comments("".join(parts) + "".join(pending)).strip()
+        if remaining:
+            yield remaining
+
+    @staticmethod
+    def _strip_leading_comments(statement):
+        return statement[_LEADING_COMMENTS_RE.match(statement).end():]
@@ -0,0 +1,73 @@
+"""
+JSON Provider - orjson-backed JSON encoding for Flask responses
+"""
+import dataclasses
+import datetime
+import decimal
+import orjson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+# Rows serialized per chunk by iter_json_object
+STREAM_BATCH_ROWS = 500
+
+# Dates are passed through to _default so responses keep Flask's HTTP-date
+# format instead of switching to orjson's native ISO 8601 output.
+DUMPS_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def _default(obj):
+    """Serializes the types Flask's default provider handles that orjson doesn't."""
+    if isinstance(obj, datetime.date):
+        return http_date(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode(obj):
+    """Serializes obj to JSON bytes exactly as Flask responses do."""
+    return orjson.dumps(obj, default=_default, option=DUMPS_OPTIONS)
+
+
+class ORJSONProvider(JSONProvider):
+    """Drop-in replacement for Flask's stdlib json provider."""
+
+    def dumps(self, obj, **kwargs):
+        return encode(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def iter_json_object(obj, key, items):
+    """
+    Yields obj as a JSON object with obj[key] replaced by the items
+    iterable, serialized a batch at a time instead of as one body.
+    Clients receive the same document jsonify(obj) would produce.
+    """
+    head = {k: v for k, v in obj.items() if k != key}
+    prefix = orjson.dumps(head, default=_default, option=DUMPS_OPTIONS)[:-1]
+    yield prefix + (b',"' if head else b'"') + key.encode() + b'":['
+
+    first = True
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= STREAM_BATCH_ROWS:
+            yield _dump_batch(batch, first)
+            first = False
+            batch = []
+    if batch:
+        yield _dump_batch(batch, first)
+    yield b"]}"
+
+
+def _dump_batch(batch, first):
+    # Serialize the batch as one array and strip its brackets
+    body = orjson.dumps(batch, default=_default, option=DUMPS_OPTIONS)[1:-1]
+    return body if first else b"," + body
@@ -1,80 +1,158 @@
+import asyncio
 import json
-from openai import OpenAI, OpenAIError
+import threading
+import httpx
+from openai import AsyncOpenAI, OpenAIError, DefaultAsyncHttpxClient
 from config import Config
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# One pooled HTTP client per generator keeps TLS connections to the LLM
+# endpoint alive between questions instead of re-handshaking on each call.
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=3.0)
+HTTP_MAX_RETRIES = 3
+
+# Identical for every request; only the database section appended after it
+# varies, so the provider's prompt prefix cache can reuse it
+SYSTEM_PROMPT_RULES = """You are a SQL expert. Generate safe, read-only queries for the database described below, based on the user's question.
+
+RULES:
+1. return ONLY a JSON object with keys: "sql", "explanation", "confidence".
+2. "sql": The SQL query. MUST be a SELECT statement. NO DROP, DELETE, INSERT, UPDATE.
+3. "explanation": A brief explanation of what the query does.
+4. "confidence": "high", "medium", or "low".
+5. "tables_affected": List of table names used.
+6. Do not include markdown formatting (like ```json) in the response, just the raw JSON string.
+"""
+
+# Built system prompts kept per (db_type, schema summary)
+PROMPT_CACHE_SIZE = 32
+
+
 class LLMQueryGenerator:
     def __init__(self):
         self.provider = Config.LLM_PROVIDER # 'openai' or 'ollama'
         self.client = None
+        # The async client and everything awaiting it live on this loop, so
+        # concurrent generations share one thread instead of pinning one
+        # each. Sync (Flask) and async (FastAPI) callers both submit to it.
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-loop", daemon=True).start()
+        # Requests for the same (question, schema, db_type) that arrive while
+        # one is already with the LLM share its answer instead of paying for
+        # another completion (double submits, several open tabs).
+        # Only touched from self._loop, so it needs no lock.
+        self._inflight = {}
+        self._prompt_cache = {}
         self._setup_client()
 
     def _setup_client(self):
         try:
             if self.provider == 'ollama':
                 logger.info(f"Using Ollama at {Config.OLLAMA_BASE_URL}")
-                self.client = OpenAI(
+                self.client = AsyncOpenAI(
                     base_url=f"{Config.OLLAMA_BASE_URL}/v1",
-                    api_key="ollama" # required but ignored
+                    api_key="ollama", # required but ignored
+                    max_retries=HTTP_MAX_RETRIES,
+                    http_client=self._build_http_client()
                 )
-                self.model = "llama3" # Default, user might need to change or we config it
+                self.model = Config.OLLAMA_MODEL
             else:
                 logger.info("Using OpenAI")
-                self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+                self.client = AsyncOpenAI(
+                    api_key=Config.OPENAI_API_KEY,
+                    max_retries=HTTP_MAX_RETRIES,
+                    http_client=self._build_http_client()
+                )
                 self.model = "gpt-4o-mini" # Fallback to gpt-3.5-turbo if needed
         except Exception as e:
             logger.error(f"Failed to setup LLM client: {e}")
 
+    def _build_http_client(self):
+        return DefaultAsyncHttpxClient(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+
     def generate_sql(self, user_question, schema_summary, db_type):
         """
         Generates SQL, explanation, and confidence score.
         Returns dict: { sql, explanation, confidence } or None on error.
+        Blocks the calling thread; async code should use agenerate_sql.
         """
+        return self._submit(user_question, schema_summary, db_type).result()
+
+    async def agenerate_sql(self, user_question, schema_summary, db_type):
+        """Awaitable generate_sql, usable from any event loop."""
+        return await asyncio.wrap_future(self._submit(user_question, schema_summary, db_type))
+
+    def _submit(self, user_question, schema_summary, db_type):
+        return asyncio.run_coroutine_threadsafe(
+            self._generate_coalesced(user_question, schema_summary, db_type), self._loop
+        )
+
+    async def _generate_coalesced(self, user_question, schema_summary, db_type):
+        key = (user_question.strip(), schema_summary, db_type)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            logger.info("Joining in-flight generation for identical question")
+            return await asyncio.shield(inflight)
+
+        inflight = self._inflight[key] = self._loop.create_future()
+        result = None
+        try:
+            result = await self._generate_sql(user_question, schema_summary, db_type)
+        finally:
+            self._inflight.pop(key, None)
+            inflight.set_result(result)
+        return result
+
+    def _system_prompt(self, schema_summary, db_type):
+        """Returns the system prompt for a schema, building it once per schema."""
+        # The summary string is its own key: its hash is computed once and
+        # kept on the (cached) string, where a digest re-reads it every call
+        key = (db_type, schema_summary)
+        prompt = self._prompt_cache.get(key)
+        if prompt is None:
+            if len(self._prompt_cache) >= PROMPT_CACHE_SIZE:
+                self._prompt_cache.clear()
+            prompt = self._prompt_cache[key] = (
+                f"{SYSTEM_PROMPT_RULES}\nDATABASE: {db_type}\n\nSCHEMA:\n{schema_summary}\n"
+            )
+        return prompt
+
+    async def _generate_sql(self, user_question, schema_summary, db_type):
         if not self.client:
             logger.error("LLM client not initialized")
             return None
 
-        system_prompt = f"""You are a SQL expert. Generate safe, read-only {db_type} queries based on the user's question and the provided database schema.
-        
-        RULES:
-        1. return ONLY a JSON object with keys: "sql", "explanation", "confidence".
-        2. "sql": The SQL query. MUST be a SELECT statement. NO DROP, DELETE, INSERT, UPDATE.
-        3. "explanation": A brief explanation of what the query does.
-        4. "confidence": "high", "medium", or "low".
-        5. "tables_affected": List of table names used.
-        6. Do not include markdown formatting (like ```json) in the response, just the raw JSON string.
-        
-        SCHEMA:
-        {schema_summary}
-        """
+        system_prompt = self._system_prompt(schema_summary, db_type)
 
         try:
-            # Adjust model for Ollama if needed
-            model_to_use = self.model
-            if self.provider == 'ollama':
-                 # In a real app we'd let user pick, for MVP hardcode common or use env
-                 # config.py doesn't have model var, let's assume 'llama3' or allow env override
-                 import os
-                 model_to_use = os.getenv("OLLAMA_MODEL", "llama3")
+            request_options = {}
+            if self.provider != 'ollama':
+                # JSON mode: the API guarantees a parseable JSON object
+                request_options["response_format"] = {"type": "json_object"}
 
-            response = self.client.chat.completions.create(
-                model=model_to_use,
+            response = await self.client.chat.completions.create(
+                model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_question}
                 ],
                 temperature=0.1,
+                **request_options
             )
             
             content = response.choices[0].message.content.strip()
             
-            # Cleanup markdown code blocks if LLM ignores instruction
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.endswith("```"):
-                content = content[:-3]
+            # Ollama models don't all honor JSON mode; cleanup markdown code
+            # blocks if the LLM ignores the instruction
+            if self.provider == 'ollama':
+                if content.startswith("```json"):
+                    content = content[7:]
+                if content.endswith("```"):
+                    content = content[:-3]
                 
             return json.loads(content)
 
@@ -4,8 +4,9 @@ import logging
 import threading
 import uuid
 from typing import Dict, Any
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.wsgi import WSGIMiddleware
 import os
 
@@ -13,8 +14,13 @@ import os
 os.environ["FASTAPI_MODE"] = "1"
 
 # Import existing Flask app and components
-from app import app as flask_app, db_connector
-from query_runner import QueryRunner
+from app import (
+    app as flask_app, db_connector, schema_inspector, llm_generator, query_executor, table_manager,
+    submit_db_task, DB_TASK_TIMEOUT, DB_NOT_CONNECTED_ERROR, DB_BUSY_ERROR, DB_TIMEOUT_ERROR
+)
+from json_provider import encode, iter_json_object
+from request_params import TableDataParams
+from query_runner import QueryRunner, SessionConnection
 from logger import setup_logger
 
 # Setup logging
@@ -35,9 +41,23 @@ app.add_middleware(
 # Initialize QueryRunner
 query_runner = QueryRunner(db_connector)
 
+# Messages a streaming query may queue ahead of the WebSocket sender
+STREAM_QUEUE_DEPTH = 4
+# Seconds a worker waiting for queue space goes between cancel checks
+STREAM_CANCEL_POLL = 0.5
+# Seconds between checks for an idle session connection to close
+SESSION_REAP_INTERVAL = 60
+
 # Store active queries: query_id -> { "cancel_event": Event, "task": asyncio.Task }
 active_queries: Dict[str, Dict[str, Any]] = {}
 
+async def send_message(websocket: WebSocket, message: Dict[str, Any]):
+    """
+    Sends a message as a JSON text frame, encoded by orjson like the REST
+    responses (which also covers dates and Decimals in result rows).
+    """
+    await websocket.send_text(encode(message).decode())
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
     """
@@ -55,6 +75,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
     connection_id = str(uuid.uuid4())
     logger.info(f"WebSocket connected: {connection_id}")
 
+    # The tab's queries share one DB connection, opened on its first query
+    session = SessionConnection(db_connector)
+    reaper = asyncio.create_task(close_idle_session(session))
+
     try:
         while True:
             data = await websocket.receive_text()
@@ -65,20 +89,20 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
                 payload = message.get("payload", {})
 
                 if msg_type == "ping":
-                    await websocket.send_json({
+                    await send_message(websocket, {
                         "type": "pong",
                         "requestId": request_id,
                         "payload": {}
                     })
 
                 elif msg_type == "runQuery":
-                    await handle_run_query(websocket, request_id, payload)
+                    await handle_run_query(websocket, request_id, payload, session)
 
                 elif msg_type == "cancelQuery":
                     query_id = payload.get("queryId")
                     if query_id and query_id in active_queries:
                         active_queries[query_id]["cancel_event"].set()
-                        await websocket.send_json({
+                        await send_message(websocket, {
                             "type": "queryCanceled",
                             "payload": {"queryId": query_id}
                         })
@@ -95,13 +119,23 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(None)):
         # We need to track which queries belong to this connection if we support multiple Tabs per socket.
         # For now, let's just leave them or cleanup if we tracked them.
         pass
+    finally:
+        reaper.cancel()
+        # Waits for a query still holding the connection; its sends fail and cancel it
+        await asyncio.to_thread(session.close)
+
+async def close_idle_session(session: SessionConnection):
+    """Releases the session's connection once it has been idle too long."""
+    while True:
+        await asyncio.sleep(SESSION_REAP_INTERVAL)
+        await asyncio.to_thread(session.close_if_idle)
 
-async def handle_run_query(websocket: WebSocket, request_id: str, payload: Dict[str, Any]):
+async def handle_run_query(websocket: WebSocket, request_id: str, payload: Dict[str, Any], session: SessionConnection):
     sql = payload.get("sql")
     query_id = str(uuid.uuid4())
     
     # Notify accepted
-    await websocket.send_json({
+    await send_message(websocket, {
         "type": "queryAccepted",
         "requestId": request_id,
         "payload": {"queryId": query_id}
@@ -114,82 +148,81 @@ async def handle_run_query(websocket: WebSocket, request_id: str, payload: Dict[
     async def stream_query():
         try:
             # Inform UI running
-            await websocket.send_json({
+            await send_message(websocket, {
                 "type": "queryProgress",
                 "payload": {"queryId": query_id, "status": "running", "rowsSent": 0}
             })
 
-            # Run blocking generator in thread pool
-            iterator = await asyncio.to_thread(
-                query_runner.run_sql_streaming, 
-                sql, 
-                cancel_event
-            )
-            
-            # Iterate over the generator. 
-            # Note: The generator yields chunks. The generator execution itself happens in the thread 
-            # but we need to iterate it. 
-            # Wait, `run_sql_streaming` is a generator function. 
-            # Calling it returns a generator object immediately. 
-            # We need to iterate over the generator object, which will execute code.
-            # BUT the generator code needs to run in the thread.
-            # So `asyncio.to_thread` on the generator function just returns the generator object, it doesn't run it.
-            
-            # Correction: We need a helper that runs the iteration in the thread and pushes into a queue, 
-            # OR we simply iterate in the thread and use a callback to the loop?
-            # Or use `run_in_executor` to iterate?
-            
-            # Let's adjust: We can use an async iterator wrapper if we modify `query_runner`?
-            # Or simpler: run the WHOLE loop in the thread, and use `asyncio.run_coroutine_threadsafe` 
-            # to send messages back to the websocket?
-            
-            # Let's try the `run_coroutine_threadsafe` approach. It's robust for this.
-            
-            # However, I need to pass the `loop` to the thread.
-            loop = asyncio.get_event_loop()
-            
+            # The blocking generator runs in a worker thread and hands messages
+            # to the loop through a queue; a sender coroutine writes them out.
+            # The worker never waits on an individual send, only on credits.
+            # It also does the JSON encoding, keeping that off the event loop.
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            credits = threading.BoundedSemaphore(STREAM_QUEUE_DEPTH)
+
+            def publish(message):
+                # Encoded before waiting, so it overlaps the previous send
+                frame = encode(message).decode()
+                # Blocks only while STREAM_QUEUE_DEPTH messages are unsent.
+                # A stalled socket must not pin the worker (and its DB
+                # connection) forever, so a cancel drops the message instead.
+                while not credits.acquire(timeout=STREAM_CANCEL_POLL):
+                    if cancel_event.is_set():
+                        return
+                loop.call_soon_threadsafe(queue.put_nowait, frame)
+
             def thread_target():
                 try:
-                    gen = query_runner.run_sql_streaming(sql, cancel_event)
-                    for chunk in gen:
-                        if chunk["type"] == "chunk":
-                             # Send chunk
-                             asyncio.run_coroutine_threadsafe(
-                                 websocket.send_json({
-                                     "type": "queryRows",
-                                     "payload": {
-                                         "queryId": query_id,
-                                         "columns": chunk["columns"],
-                                         "rows": chunk["rows"]
-                                     }
-                                 }), loop
-                             ).result() # Wait for send? Or fire and forget? 
-                             # `result()` waits, which provides backpressure! Nice.
-                             
-                        elif chunk["type"] == "done":
-                            asyncio.run_coroutine_threadsafe(
-                                websocket.send_json({
+                    # A query overlapping another on the same tab gets a
+                    # pooled connection instead (conn is None)
+                    with session.acquire() as conn:
+                        gen = query_runner.run_sql_streaming(sql, cancel_event, conn=conn)
+                        for chunk in gen:
+                            if chunk["type"] == "chunk":
+                                payload = {"queryId": query_id, "rows": chunk["rows"]}
+                                # Present on the first chunk only
+                                if "columns" in chunk:
+                                    payload["columns"] = chunk["columns"]
+                                publish({
+                                    "type": "queryRows",
+                                    "payload": payload
+                                })
+                            elif chunk["type"] == "done":
+                                publish({
                                     "type": "queryDone",
                                     "payload": {
                                         "queryId": query_id,
                                         "stats": chunk["stats"]
                                     }
-                                }), loop
-                            ).result()
-                            
+                                })
                 except Exception as e:
-                    asyncio.run_coroutine_threadsafe(
-                        websocket.send_json({
-                            "type": "queryError",
-                            "payload": {
-                                "queryId": query_id,
-                                "message": str(e)
-                            }
-                        }), loop
-                    )
-
-            # Start the thread
-            await asyncio.to_thread(thread_target)
+                    publish({
+                        "type": "queryError",
+                        "payload": {
+                            "queryId": query_id,
+                            "message": str(e)
+                        }
+                    })
+                finally:
+                    # End-of-stream sentinel, takes no credit
+                    loop.call_soon_threadsafe(queue.put_nowait, None)
+
+            async def sender():
+                failed = False
+                while (frame := await queue.get()) is not None:
+                    try:
+                        if not failed:
+                            await websocket.send_text(frame)
+                    except Exception as e:
+                        # Socket gone: stop the query, drain what is queued
+                        logger.warning(f"Stopping query {query_id}, send failed: {e}")
+                        failed = True
+                        cancel_event.set()
+                    finally:
+                        credits.release()
+
+            await asyncio.gather(loop.run_in_executor(None, thread_target), sender())
             
         except Exception as e:
             logger.error(f"Async wrapper error: {e}")
@@ -201,10 +234,99 @@ async def handle_run_query(websocket: WebSocket, request_id: str, payload: Dict[
     active_queries[query_id] = {"cancel_event": cancel_event, "task": task}
 
 
+class AppJSONResponse(JSONResponse):
+    """JSON encoded the same way as the Flask routes' responses."""
+    def render(self, content):
+        return encode(content)
+
+
+# ============ Native REST Endpoints ============
+# The hottest routes are served on the event loop directly instead of
+# through WSGIMiddleware's thread hop. They have no Flask counterpart; the
+# app is served as main:app.
+
+@app.get("/api/health")
+async def health_check():
+    return AppJSONResponse({"status": "ok", "service": "QueryPop Backend"})
+
+@app.post("/api/query/generate")
+async def generate_query(request: Request):
+    if not db_connector.is_connected():
+        return AppJSONResponse(DB_NOT_CONNECTED_ERROR, status_code=401)
+
+    data = await request.json()
+    question = data.get('question')
+
+    if not question:
+        return AppJSONResponse({"error": "Question required"}, status_code=400)
+
+    schema_summary = await asyncio.to_thread(schema_inspector.get_schema_summary)
+    if not schema_summary:
+        return AppJSONResponse({"error": "No schema found. Connect to DB first."}, status_code=400)
+
+    # Awaits the LLM without holding a thread
+    result = await llm_generator.agenerate_sql(question, schema_summary, db_connector.db_type or "SQL")
+
+    if result:
+        return AppJSONResponse(result)
+    return AppJSONResponse({"error": "Failed to generate SQL"}, status_code=500)
+
+@app.post("/api/query/execute")
+async def execute_query(request: Request, output_format: str = Query(None, alias="format")):
+    if not db_connector.is_connected():
+        return AppJSONResponse(DB_NOT_CONNECTED_ERROR, status_code=401)
+
+    data = await request.json()
+    sql = data.get('sql')
+    question = data.get('question', '') # Optional context for logging
+    profile = data.get('profile', False)
+    # ?format=columnar returns rows as value arrays (column names sent once)
+    columnar = output_format == 'columnar'
+
+    if not sql:
+        return AppJSONResponse({"error": "SQL query required"}, status_code=400)
+
+    # Runs on the bounded db_executor shared with the import route
+    future = submit_db_task(query_executor.execute_and_log, sql, question, profile, columnar)
+    if future is None:
+        return AppJSONResponse(DB_BUSY_ERROR, status_code=503)
+    try:
+        result = await asyncio.wait_for(asyncio.wrap_future(future), DB_TASK_TIMEOUT)
+    except asyncio.TimeoutError:
+        return AppJSONResponse(DB_TIMEOUT_ERROR, status_code=504)
+
+    return AppJSONResponse(result, status_code=200 if result["success"] else 400)
+
+@app.get("/api/tables/{table_name}/data")
+async def get_table_data(table_name: str, request: Request):
+    if not db_connector.is_connected():
+        return AppJSONResponse(DB_NOT_CONNECTED_ERROR, status_code=401)
+
+    params = TableDataParams.from_args(request.query_params)
+
+    def load():
+        # A single-column primary key enables keyset (?after= / ?before=) pagination
+        key_column = db_connector.get_key_column(table_name)
+        return table_manager.get_table_data(
+            table_name, params.page, params.per_page, params.order_by, params.order_dir, params.filters,
+            key_column=key_column, after=params.after, before=params.before, columnar=params.columnar,
+            word_search=params.word_search
+        )
+
+    # Table browsing stays off db_executor so a query backlog never turns
+    # page loads away
+    result = await asyncio.to_thread(load)
+    if result["success"]:
+        # Rows are encoded in batches as the body is sent, in a worker thread
+        return StreamingResponse(iter_json_object(result, "rows", result["rows"]), media_type="application/json")
+    return AppJSONResponse(result, status_code=400)
+
+
 # Mount Flask app for REST API
 # Path /api and others fall through to Flask
 app.mount("/", WSGIMiddleware(flask_app))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000)
+    # Same loop as the container's CMD; uvloop ships with uvicorn[standard]
+    uvicorn.run(app, host="0.0.0.0", port=5000, loop="uvloop")
@@ -1,22 +1,75 @@
+import functools
+import queue
 import re
+import threading
 import time
 import sqlite3
 from sqlalchemy import inspect
+import app_db
 from config import Config
 from logger import setup_logger
 from safety_validator import SafetyValidator
 
 logger = setup_logger(__name__)
 
+# History entries waiting for the writer thread, and most written per commit
+HISTORY_QUEUE_SIZE = 10000
+HISTORY_BATCH_ROWS = 256
+# Seconds a query waits for room in a full writer queue before writing its
+# entry itself, and a history read waits for queued entries to be written
+HISTORY_PUT_TIMEOUT = 1
+HISTORY_FLUSH_TIMEOUT = 2
+# History rows read from SQLite per fetch
+HISTORY_FETCH_ROWS = 256
+
+_INSERT_HISTORY_SQL = """
+    INSERT INTO query_history 
+    (question, sql, status, execution_time_ms, row_count, error_message)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Single-table detection runs on the raw SQL; \s+ stands in for the
+# whitespace normalization
+_FROM_RE = re.compile(r'(?i)\bFROM\s+[`"]?([a-zA-Z0-9_]+)[`"]?')
+_JOIN_RE = re.compile(r'(?i)\bJOIN\b')
+
+@functools.lru_cache(maxsize=256)
+def _single_table(sql_query):
+    """
+    Name of the one table a query reads from, or None if it joins or the
+    table can't be told. Cached: the console re-runs the same SQL a lot.
+    """
+    # Simple regex to find single table SELECT
+    # Matches: SELECT ... FROM `table` ... or FROM table ...
+    # Ignores queries with JOIN, comma-separated tables (implicit join)
+    # This is conservative to avoid enabling editing on ambiguous results
+
+    # Check for explicit JOIN
+    if _JOIN_RE.search(sql_query):
+        return None # Complex query, skip editing
+    match = _FROM_RE.search(sql_query)
+    # Any comma after FROM may be an implicit join
+    if not match or "," in sql_query[match.end():]:
+        return None
+    return match.group(1)
+
 class QueryExecutor:
     def __init__(self, db_connector):
         self.db_connector = db_connector
         self.app_db_path = Config.APP_DB_PATH
+        # Read connection for get_history; the writer thread has its own
+        self._conn = None
+        self._conn_lock = threading.Lock()
         self._init_history_db()
+        # History is written off the request path by one background thread
+        self._log_queue = queue.Queue(maxsize=HISTORY_QUEUE_SIZE)
+        threading.Thread(target=self._log_worker, name="history-writer", daemon=True).start()
 
     def _init_history_db(self):
         try:
-            with sqlite3.connect(self.app_db_path) as conn:
+            self._conn = conn = app_db.connect(self.app_db_path)
+            conn.row_factory = sqlite3.Row
+            with conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS query_history (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -32,7 +85,7 @@ class QueryExecutor:
         except Exception as e:
             logger.error(f"Failed to init history DB: {e}")
 
-    def execute_and_log(self, sql_query, question="", profile=False):
+    def execute_and_log(self, sql_query, question="", profile=False, columnar=False):
         """
         Validates, executes, and logs a query.
         """
@@ -59,7 +112,7 @@ class QueryExecutor:
             # Implementation pending threading complexity, for now assumes db driver handles reasonable timeouts
             # or we set query timeout in connection args.
             
-            result = self.db_connector.execute_query(sql_query, profile=profile)
+            result = self.db_connector.execute_query(sql_query, profile=profile, columnar=columnar)
             
             execution_time_ms = (time.time() - start_time) * 1000
             
@@ -73,28 +126,14 @@ class QueryExecutor:
                 primary_keys = []
                 
                 try:
-                    # Simple regex to find single table SELECT
-                    # Matches: SELECT ... FROM `table` ... or FROM table ...
-                    # Ignores queries with JOIN, comma-separated tables (implicit join)
-                    # This is conservative to avoid enabling editing on ambiguous results
-                    
-                    # Normalize spaces
-                    clean_sql = ' '.join(sql_query.split())
-                    
-                    # Check for explicit JOIN or comma joins
-                    if " JOIN " in clean_sql.upper() or "," in clean_sql.upper().split(" FROM ")[-1]:
-                        pass # Complex query, skip editing
-                    else:
-                        match = re.search(r'(?i)FROM\s+[`"]?([a-zA-Z0-9_]+)[`"]?', clean_sql)
-                        if match:
-                            table_name = match.group(1)
-                            # Verify table exists and get PKs
-                            inspector = self.db_connector.get_inspector()
-                            if inspector.has_table(table_name):
-                                affected_table = table_name
-                                pk_constraint = inspector.get_pk_constraint(table_name)
-                                if pk_constraint and pk_constraint.get("constrained_columns"):
-                                    primary_keys = pk_constraint["constrained_columns"]
+                    table_name = _single_table(sql_query)
+                    if table_name:
+                        # Verify table exists and get PKs (cached per table
+                        # until the schema is re-inspected)
+                        keys = self.db_connector.get_primary_keys(table_name)
+                        if keys is not None:
+                            affected_table = table_name
+                            primary_keys = keys
                 except Exception as e:
                     logger.warning(f"Failed to detect table metadata: {e}")
 
@@ -122,28 +161,90 @@ class QueryExecutor:
             self._log_query(question, sql_query, status, execution_time_ms, row_count, error_msg)
 
     def _log_query(self, question, sql, status, exec_time, rows, error):
+        entry = (question, sql, status, exec_time, rows, error)
+        log_queue = self._log_queue
+        if log_queue is not None:
+            try:
+                log_queue.put(entry, timeout=HISTORY_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                logger.warning("History writer queue is full, writing entry inline")
+        # No writer thread to hand it to: write it here rather than lose it
         try:
-            with sqlite3.connect(self.app_db_path) as conn:
-                conn.execute(
-                    """
-                    INSERT INTO query_history 
-                    (question, sql, status, execution_time_ms, row_count, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (question, sql, status, exec_time, rows, error)
-                )
+            with self._conn_lock, self._conn:
+                self._conn.execute(_INSERT_HISTORY_SQL, entry)
         except Exception as e:
             logger.error(f"Failed to log query history: {e}")
 
-    def get_history(self, limit=20):
+    def _flush_history(self):
+        """Waits (bounded) until every queued history entry is written."""
+        log_queue = self._log_queue
+        if log_queue is None:
+            return
+        with log_queue.all_tasks_done:
+            if not log_queue.all_tasks_done.wait_for(
+                lambda: not log_queue.unfinished_tasks, HISTORY_FLUSH_TIMEOUT
+            ):
+                logger.warning("History read before all queued entries were written")
+
+    def _log_worker(self):
+        """Writes queued history entries, everything queued so far per commit."""
+        log_queue = self._log_queue
+        try:
+            conn = app_db.connect(self.app_db_path)
+        except Exception as e:
+            logger.error(f"Failed to open history DB, writing history inline: {e}")
+            self._log_queue = None
+            # Hand back anything queued before the writer gave up
+            while True:
+                try:
+                    self._log_query(*log_queue.get_nowait())
+                except queue.Empty:
+                    return
+
+        while True:
+            batch = [log_queue.get()]
+            while len(batch) < HISTORY_BATCH_ROWS:
+                try:
+                    batch.append(log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    conn.executemany(_INSERT_HISTORY_SQL, batch)
+            except Exception as e:
+                logger.error(f"Failed to log query history: {e}")
+            finally:
+                # Lets readers waiting in _flush_history see the batch
+                for _ in batch:
+                    log_queue.task_done()
+
+    def iter_history(self, limit=20):
+        """
+        Yields history entries as dicts, newest first, reading them from
+        SQLite a batch at a time. Entries still queued for the writer
+        thread are written first, so a query just run is included.
+        """
+        self._flush_history()
         try:
-            with sqlite3.connect(self.app_db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute(
-                    "SELECT * FROM query_history ORDER BY timestamp DESC LIMIT ?", 
+            with self._conn_lock:
+                # Newest first by id: the rowid is already indexed and follows
+                # insertion order, where timestamp (whole seconds) would need
+                # its own index and still tie
+                cursor = self._conn.execute(
+                    "SELECT * FROM query_history ORDER BY id DESC LIMIT ?", 
                     (limit,)
                 )
-                return [dict(row) for row in cursor.fetchall()]
+            while True:
+                # The lock is only held per fetch, never across a yield
+                with self._conn_lock:
+                    rows = cursor.fetchmany(HISTORY_FETCH_ROWS)
+                if not rows:
+                    return
+                for row in rows:
+                    yield dict(row)
         except Exception as e:
             logger.error(f"Failed to fetch history: {e}")
-            return []
+
+    def get_history(self, limit=20):
+        return list(self.iter_history(limit))
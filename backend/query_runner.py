@@ -2,12 +2,88 @@ import asyncio
 import logging
 import threading
 import time
+from contextlib import contextmanager, nullcontext
 from typing import Any, Dict, List, Optional, Generator
 from sqlalchemy import text
 from db_connector import DBConnector
 
 logger = logging.getLogger(__name__)
 
+# Rows the server-side cursor fetches per round trip; the WebSocket chunks
+# (batch_size) are served from that buffer
+STREAM_FETCH_ROWS = 1000
+
+# Seconds a session's pinned connection may sit unused before it's closed
+SESSION_IDLE_TIMEOUT = 600
+
+class SessionConnection:
+    """
+    A connection pinned to one SQL console session, so its queries reuse one
+    DB session (SET variables, temp tables) instead of a pool checkout each.
+    """
+    def __init__(self, db_connector: DBConnector, idle_timeout: float = SESSION_IDLE_TIMEOUT):
+        self.db_connector = db_connector
+        self.idle_timeout = idle_timeout
+        self._conn = None
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+
+    @contextmanager
+    def acquire(self):
+        """
+        Yields the pinned connection, opening it on first use, or None while
+        another query of the session holds it.
+        """
+        if not self._lock.acquire(blocking=False):
+            yield None
+            return
+        try:
+            engine = self.db_connector.engine
+            if self._conn is not None and self._conn.engine is not engine:
+                # Reconnected or switched database since it was opened
+                self._close()
+            if self._conn is None and engine is not None:
+                self._conn = engine.connect()
+            yield self._conn
+        finally:
+            self._end_transaction()
+            self._last_used = time.monotonic()
+            self._lock.release()
+
+    def _end_transaction(self):
+        # Each query gets a fresh transaction (and snapshot), as it would on
+        # a pooled connection; session state survives the rollback
+        if self._conn is None:
+            return
+        try:
+            self._conn.rollback()
+        except Exception as e:
+            logger.warning(f"Dropping session connection: {e}")
+            self._close()
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Failed to close session connection: {e}")
+
+    def close_if_idle(self):
+        """Closes the connection if unused for idle_timeout seconds."""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_used >= self.idle_timeout:
+                self._close()
+        finally:
+            self._lock.release()
+
+    def close(self):
+        """Closes the connection, waiting for a running query to finish."""
+        with self._lock:
+            self._close()
+
 class QueryRunner:
     def __init__(self, db_connector: DBConnector):
         self.db_connector = db_connector
@@ -16,11 +92,13 @@ class QueryRunner:
         self, 
         sql: str, 
         cancel_event: threading.Event, 
-        batch_size: int = 100
+        batch_size: int = 100,
+        conn=None
     ) -> Generator[Dict[str, Any], None, None]:
         """
         Executes SQL and yields chunks of rows.
         Run this in a separate thread (e.g. via asyncio.to_thread).
+        Runs on conn if given (left open), else on a pooled connection.
         """
         if not self.db_connector.is_connected():
             raise Exception("Database not connected")
@@ -28,55 +106,63 @@ class QueryRunner:
         engine = self.db_connector.engine
         start_time = time.time()
         row_count = 0
+        # Polled once per batch. is_set() is a lock-free flag read; binding it
+        # once spares the attribute lookups in the fetch loop.
+        canceled = cancel_event.is_set
         
         try:
             # Connect and execute with streaming
-            # execution_options(yield_per=batch_size) is key for server-side cursors on some drivers
-            with engine.connect().execution_options(yield_per=batch_size) as conn:
+            with nullcontext(conn) if conn is not None else engine.connect() as conn:
                 logger.info(f"Executing query: {sql[:50]}...")
                 
                 # Check cancellation before starting
-                if cancel_event.is_set():
+                if canceled():
                     logger.info("Query canceled before execution")
                     return
 
-                try:
-                    result = conn.execute(text(sql))
-                except Exception as e:
-                    # Reraise as specific error for caller to handle
-                    raise e
-
-                # If returns rows, stream them
-                if result.returns_rows:
-                    columns = list(result.keys())
+                # Server-side cursor (pymysql SSCursor, psycopg2 named
+                # cursor), so the driver never buffers the whole result.
+                # Passed per statement so a caller's connection keeps its
+                # options; closing the result frees the cursor even when
+                # the stream is cut short.
+                with conn.execute(
+                    text(sql),
+                    execution_options={
+                        "stream_results": True,
+                        "yield_per": max(batch_size, STREAM_FETCH_ROWS),
+                    },
+                ) as result:
+                    if result.returns_rows:
+                        columns = list(result.keys())
                     
-                    while True:
-                        if cancel_event.is_set():
-                            logger.info("Query canceled during fetching")
-                            break
+                        while True:
+                            if canceled():
+                                logger.info("Query canceled during fetching")
+                                break
                             
-                        # Fetch a batch
-                        chunk = result.fetchmany(batch_size)
-                        if not chunk:
-                            break
+                            # Fetch a batch
+                            chunk = result.fetchmany(batch_size)
+                            if not chunk:
+                                break
                             
-                        # Convert to dicts or simple lists. 
-                        # Lists are smaller over wire, but dicts connect to columns.
-                        # Let's send rows as lists of values to save bandwidth, 
-                        # as we send columns once.
-                        rows = [list(row) for row in chunk]
-                        row_count += len(rows)
+                            # Convert to dicts or simple lists. 
+                            # Lists are smaller over wire, but dicts connect to columns.
+                            # Let's send rows as lists of values to save bandwidth, 
+                            # as we send columns once.
+                            # Plain tuples: the cheapest copy out of Row, and
+                            # orjson writes them as JSON arrays all the same.
+                            rows = list(map(tuple, chunk))
+                            row_count += len(rows)
                         
-                        yield {
-                            "type": "chunk",
-                            "columns": columns, # Send every time? Or just first time? 
-                                                # Protocol says "queryRows" has columns. 
-                                                # Redundant but safe for now.
-                            "rows": rows
-                        }
-                else:
-                    # UPDATE/INSERT/DELETE
-                    row_count = result.rowcount
+                            message = {"type": "chunk", "rows": rows}
+                            # Column names go out once, with the first chunk
+                            if columns is not None:
+                                message["columns"] = columns
+                                columns = None
+                            yield message
+                    else:
+                        # UPDATE/INSERT/DELETE
+                        row_count = result.rowcount
                     
                 total_time = (time.time() - start_time) * 1000
                 yield {
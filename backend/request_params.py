@@ -0,0 +1,71 @@
+"""
+Request Params - Typed parsing of endpoint query parameters
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# Query parameters of the table data endpoint that are not column filters
+# ('t' is often used for cache busting)
+TABLE_DATA_RESERVED_PARAMS = frozenset({'page', 'per_page', 'order_by', 'order_dir', 'after', 'before', 'format', 'search', 't'})
+
+
+@dataclass(frozen=True)
+class TableDataParams:
+    page: int = 1
+    per_page: int = 50
+    order_by: Optional[str] = None
+    order_dir: str = 'asc'
+    filters: Dict[str, str] = field(default_factory=dict)
+    # Keyset cursors: primary key value of the last row already seen, or of
+    # the first row of the page to go back from
+    after: Optional[str] = None
+    before: Optional[str] = None
+    # ?format=columnar: rows as value arrays (column names sent once)
+    columnar: bool = False
+    # ?search=words: "contains" filters on FULLTEXT-indexed columns match
+    # whole-word prefixes instead of substrings
+    word_search: bool = False
+
+    @classmethod
+    def from_args(cls, args):
+        """Builds the params from a request's query args in a single pass."""
+        page = 1
+        per_page = 50
+        order_by = None
+        order_dir = 'asc'
+        filters = {}
+        after = None
+        before = None
+        columnar = False
+        word_search = False
+
+        for key, value in args.items():
+            if key == 'page':
+                page = _to_int(value, page)
+            elif key == 'per_page':
+                per_page = _to_int(value, per_page)
+            elif key == 'order_by':
+                order_by = value or None
+            elif key == 'order_dir':
+                order_dir = value
+            elif key == 'after':
+                after = value or None
+            elif key == 'before':
+                before = value or None
+            elif key == 'format':
+                columnar = value == 'columnar'
+            elif key == 'search':
+                word_search = value == 'words'
+            elif key not in TABLE_DATA_RESERVED_PARAMS and value:
+                # Everything else is a column filter
+                filters[key] = value
+
+        return cls(page, per_page, order_by, order_dir, filters, after, before, columnar, word_search)
+
+
+def _to_int(value, default):
+    # Same leniency as request.args.get(..., type=int): bad input -> default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
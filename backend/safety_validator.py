@@ -1,11 +1,17 @@
 import re
 from logger import setup_logger
 
+try:
+    # Optional: a SIMD multi-pattern scanner for the forbidden keywords
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
 logger = setup_logger(__name__)
 
 class SafetyValidator:
     # Allowed verbs
-    ALLOWED_VERBS = {'SELECT', 'WITH', 'EXPLAIN', 'SHOW', 'DESCRIBE'}
+    ALLOWED_VERBS = frozenset({'SELECT', 'WITH', 'EXPLAIN', 'SHOW', 'DESCRIBE'})
     
     # Explicitly forbidden keywords/patterns
     FORBIDDEN_KEYWORDS = [
@@ -22,25 +28,73 @@ class SafetyValidator:
         """
         Returns (is_safe, reason).
         """
-        if not sql_query or not sql_query.strip():
+        # isspace() tests in place; strip() would copy the whole query
+        if not sql_query or sql_query.isspace():
             return False, "Empty query"
 
-        # Remove comments to avoid hiding attacks?
-        # Simple comment stripping: -- ... or /* ... */
-        # But regex on raw string usually safer if we catch keywords anywhere.
-        # Let's normalize whitespace
-        normalized = ' '.join(sql_query.upper().split())
-
-        # Check for forbidden keywords
-        for pattern in SafetyValidator.FORBIDDEN_KEYWORDS:
-            if re.search(pattern, normalized):
-                logger.warning(f"Safety check failed. Found forbidden pattern: {pattern}")
-                return False, f"Query contains forbidden keyword matching: {pattern}"
+        # Check for forbidden keywords anywhere in the raw query, all
+        # patterns in one case-insensitive pass
+        match = _find_forbidden(sql_query)
+        if match:
+            keyword = ' '.join(match.group(0).upper().split())
+            logger.warning(f"Safety check failed. Found forbidden keyword: {keyword}")
+            return False, f"Query contains forbidden keyword: {keyword}"
 
         # Check if it starts with allowed verb
-        first_word = normalized.split()[0]
+        match = _FIRST_WORD_RE.match(sql_query)
+        first_word = match.group(1).upper() if match else None
         if first_word not in SafetyValidator.ALLOWED_VERBS:
              logger.warning(f"Safety check failed. Query must start with SELECT (got {first_word})")
              return False, "Query must start with SELECT or other read-only statement"
 
         return True, "Safe"
+
+
+# Compiled once: a single alternation of every forbidden pattern
+_FORBIDDEN_RE = re.compile('|'.join(SafetyValidator.FORBIDDEN_KEYWORDS), re.IGNORECASE)
+# The leading token; \w keeps e.g. SELECT_x whole instead of reading SELECT
+_FIRST_WORD_RE = re.compile(r'\s*(\w+)\b')
+
+
+def _compile_hyperscan(patterns):
+    """
+    Hyperscan database of the keyword literals behind patterns (the last
+    word of each). Every re match contains one, so a query without any
+    can't match; hits are confirmed by re.
+    """
+    if hyperscan is None:
+        return None
+    literals = [re.findall(r'[A-Z_]+', p)[-1].encode() for p in patterns]
+    flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=literals,
+            ids=list(range(len(literals))),
+            elements=len(literals),
+            flags=[flags] * len(literals),
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Hyperscan unavailable, using re for safety checks: {e}")
+        return None
+
+_HS_DB = _compile_hyperscan(SafetyValidator.FORBIDDEN_KEYWORDS)
+
+
+def _find_forbidden(sql_query):
+    """
+    First forbidden keyword match in sql_query, or None. Hyperscan, when
+    installed, clears most safe queries in one scan; re confirms and
+    reports the rest.
+    """
+    if _HS_DB is not None:
+        hits = []
+        try:
+            _HS_DB.scan(sql_query.encode(), match_event_handler=lambda pattern_id, *_: hits.append(pattern_id))
+        except Exception as e:
+            logger.warning(f"Hyperscan scan failed, falling back to re: {e}")
+        else:
+            if not hits:
+                return None
+    return _FORBIDDEN_RE.search(sql_query)
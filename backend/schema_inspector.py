@@ -1,31 +1,81 @@
+import itertools
 import os
-import sqlite3
-import json
-from sqlalchemy import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from sqlalchemy import inspect, text
+import app_db
 from config import Config
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Tables whose columns are reflected concurrently during inspection
+SCHEMA_INSPECT_WORKERS = 8
+
+# Every column of the current database in one round trip, per dialect:
+# (table, column, type) ordered by table and column position
+_BULK_COLUMNS_SQL = {
+    "mysql": text("""
+        SELECT TABLE_NAME, COLUMN_NAME, UPPER(COLUMN_TYPE)
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE()
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """),
+    "postgresql": text("""
+        SELECT table_name, column_name, UPPER(
+            CASE WHEN character_maximum_length IS NOT NULL
+                 THEN data_type || '(' || character_maximum_length || ')'
+                 ELSE data_type END)
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+        ORDER BY table_name, ordinal_position
+    """),
+}
+
 class SchemaInspector:
     def __init__(self):
         self.app_db_path = Config.APP_DB_PATH
+        # Rendered LLM schema summaries keyed by (db_type, database).
+        # schema_cache only ever holds the active database, so an entry is
+        # valid until that database is re-inspected: inspect_and_cache_schema
+        # drops it, which covers connect, switch_database and import_sql.
+        self._summary_cache = {}
+        self._active_key = None
+        # (table_count, column_count) of the cached schema, same lifetime
+        self._stats = None
+        # Bumped on every re-inspection; lets HTTP caches key on schema changes
+        self.schema_version = 0
+        # One connection to the local cache DB, shared by all methods
+        self._conn = None
+        self._conn_lock = threading.Lock()
         self._init_cache_db()
 
     def _init_cache_db(self):
         """Initialize the local SQLite DB for caching schema."""
         os.makedirs(os.path.dirname(self.app_db_path), exist_ok=True)
         try:
-            with sqlite3.connect(self.app_db_path) as conn:
+            self._conn = conn = app_db.connect(self.app_db_path)
+            with conn:
                 conn.execute("""
                     CREATE TABLE IF NOT EXISTS schema_cache (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         table_name TEXT,
-                        columns_json TEXT, -- List of {name, type}
                         row_count INTEGER,
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # One row per column, so summaries and stats are plain
+                # queries instead of JSON parsing
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_cache_columns (
+                        table_name TEXT,
+                        position INTEGER,
+                        col_name TEXT,
+                        col_type TEXT,
+                        PRIMARY KEY (table_name, position)
+                    ) WITHOUT ROWID
+                """)
                 # We clear cache on restart for MVP simplicity or just manage it? 
                 # PROMPT: "cached in SQLite locally; refresh on demand"
                 # Let's clean it on "connect" usually.
@@ -39,39 +89,62 @@ class SchemaInspector:
         if not db_connector.engine:
             return False, "No database connection"
 
+        key = (db_connector.db_type, db_connector.engine.url.database)
+        self._summary_cache.pop(key, None)
+        self._active_key = key
+        self._stats = None
+        self.schema_version += 1
+        db_connector.clear_schema_cache()
+
         try:
             inspector = db_connector.get_inspector()
             
+            table_names = db_connector.get_table_names()
+            logger.info(f"Found tables: {table_names}")
+
+            # Reflect everything first so the cache DB is only locked for
+            # the write itself. MySQL and Postgres answer in one query;
+            # elsewhere the per-table lookups, a round trip each, run side
+            # by side on pooled connections.
+            all_columns = self._bulk_columns(db_connector, table_names)
+            if all_columns is None:
+                def table_columns(table):
+                    return [(col["name"], str(col["type"])) for col in inspector.get_columns(table)]
+
+                workers = max(1, min(SCHEMA_INSPECT_WORKERS, len(table_names)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    all_columns = list(pool.map(table_columns, table_names))
+
+            # Estimate row count (optional, can be slow on big tables)
+            # We'll skip exact count for big tables if needed, but for MVP SELECT count(*) is okay?
+            # Or just 0 if too risky. Let's try to get simple count if safe.
+            # Actually, inspector doesn't give row count easily. 
+            # We can run SELECT count(*) FROM table using the connection.
+            # But be careful with huge tables.
+            # For MVP, maybe skip row count or do a quick estimate if possible.
+            # Let's skip row count execution to be fast/safe, just cache structure.
+            row_count = 0 
+
+            column_rows = [
+                (table, position, name, col_type)
+                for table, columns in zip(table_names, all_columns)
+                for position, (name, col_type) in enumerate(columns)
+            ]
+
             # Clear old cache (for MVP we assume one active connection schema)
-            with sqlite3.connect(self.app_db_path) as local_conn:
+            # and write the new one in a single transaction
+            with self._conn_lock, self._conn as local_conn:
                 local_conn.execute("DELETE FROM schema_cache")
-                
-                table_names = inspector.get_table_names()
-                logger.info(f"Found tables: {table_names}")
-                
-                for table in table_names:
-                    # Get columns
-                    columns = []
-                    for col in inspector.get_columns(table):
-                        columns.append({
-                            "name": col["name"],
-                            "type": str(col["type"])
-                        })
-                    
-                    # Estimate row count (optional, can be slow on big tables)
-                    # We'll skip exact count for big tables if needed, but for MVP SELECT count(*) is okay?
-                    # Or just 0 if too risky. Let's try to get simple count if safe.
-                    # Actually, inspector doesn't give row count easily. 
-                    # We can run SELECT count(*) FROM table using the connection.
-                    # But be careful with huge tables.
-                    # For MVP, maybe skip row count or do a quick estimate if possible.
-                    # Let's skip row count execution to be fast/safe, just cache structure.
-                    row_count = 0 
-                    
-                    local_conn.execute(
-                        "INSERT INTO schema_cache (table_name, columns_json, row_count) VALUES (?, ?, ?)",
-                        (table, json.dumps(columns), row_count)
-                    )
+                local_conn.execute("DELETE FROM schema_cache_columns")
+                local_conn.executemany(
+                    "INSERT INTO schema_cache (table_name, row_count) VALUES (?, ?)",
+                    [(table, row_count) for table in table_names]
+                )
+                local_conn.executemany(
+                    "INSERT INTO schema_cache_columns (table_name, position, col_name, col_type) VALUES (?, ?, ?, ?)",
+                    column_rows
+                )
+            self._stats = (len(table_names), len(column_rows))
             
             return True, f"Schema cached for {len(table_names)} tables"
 
@@ -79,36 +152,71 @@ class SchemaInspector:
             logger.error(f"Schema inspection failed: {e}")
             return False, f"Schema inspection failed: {str(e)}"
 
+    def _bulk_columns(self, db_connector, table_names):
+        """
+        [(name, type), ...] per table in table_names, read from
+        information_schema in one query, or None where that isn't available.
+        """
+        sql = _BULK_COLUMNS_SQL.get(db_connector.engine.dialect.name)
+        if sql is None:
+            return None
+        try:
+            with db_connector.get_conn() as conn:
+                rows = conn.execute(sql).all()
+        except Exception as e:
+            logger.warning(f"Bulk column lookup failed, inspecting per table: {e}")
+            return None
+
+        columns = {table: [] for table in table_names}
+        for table, name, col_type in rows:
+            # information_schema also lists views; only tables are cached
+            if table in columns:
+                columns[table].append((name, col_type))
+        return [columns[table] for table in table_names]
+
     def get_schema_summary(self):
         """
         Returns a string representation of the schema for the LLM.
         """
+        cached = self._summary_cache.get(self._active_key)
+        if cached is not None:
+            return cached
+
         try:
             summary_lines = []
-            with sqlite3.connect(self.app_db_path) as conn:
-                cursor = conn.execute("SELECT table_name, columns_json FROM schema_cache")
+            with self._conn_lock:
+                # Column strings come out of SQLite ready to join
+                cursor = self._conn.execute("""
+                    SELECT s.table_name, c.col_name || ' (' || c.col_type || ')'
+                    FROM schema_cache s
+                    LEFT JOIN schema_cache_columns c ON c.table_name = s.table_name
+                    ORDER BY s.id, c.position
+                """)
                 rows = cursor.fetchall()
                 
-                for table, cols_json in rows:
-                    cols = json.loads(cols_json)
-                    col_strs = [f"{c['name']} ({c['type']})" for c in cols]
-                    summary_lines.append(f"Table: {table}")
-                    summary_lines.append(f"Columns: {', '.join(col_strs)}")
-                    summary_lines.append("---")
+            for table, group in itertools.groupby(rows, key=itemgetter(0)):
+                col_strs = [col for _, col in group if col is not None]
+                summary_lines.append(f"Table: {table}")
+                summary_lines.append(f"Columns: {', '.join(col_strs)}")
+                summary_lines.append("---")
             
-            return "\n".join(summary_lines)
+            summary = "\n".join(summary_lines)
+            if summary:
+                self._summary_cache[self._active_key] = summary
+            return summary
         except Exception as e:
             logger.error(f"Failed to get schema summary: {e}")
             return ""
 
     def get_stats(self):
         """Return (table_count, column_count_total)"""
+        if self._stats is not None:
+            return self._stats
         try:
-            with sqlite3.connect(self.app_db_path) as conn:
-                cursor = conn.execute("SELECT columns_json FROM schema_cache")
-                rows = cursor.fetchall()
-                table_count = len(rows)
-                col_count = sum(len(json.loads(r[0])) for r in rows)
-                return table_count, col_count
+            with self._conn_lock:
+                self._stats = self._conn.execute(
+                    "SELECT (SELECT COUNT(*) FROM schema_cache), (SELECT COUNT(*) FROM schema_cache_columns)"
+                ).fetchone()
+                return self._stats
         except:
             return 0, 0
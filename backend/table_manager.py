@@ -2,36 +2,423 @@
 Table Manager - CRUD operations for table data
 """
 from sqlalchemy import text, inspect
+import functools
+import io
+import re
 import time
 from logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Seconds table lists and structures are answered from memory
+METADATA_TTL = 60
+# Same for the server's database list, which rarely changes in a session
+DATABASES_TTL = 300
+
+# Seconds an exact filtered row count is reused, and most counts kept
+COUNT_TTL = 30
+COUNT_CACHE_SIZE = 256
+# Below this estimate an unfiltered table is small enough to COUNT(*) exactly
+APPROX_COUNT_MIN_ROWS = 100000
+# Filtered counts stop scanning past this many matches
+FILTER_COUNT_CAP = 10000
+
+# Page size above which table rows are read through a server-side cursor
+STREAM_FETCH_ROWS = 1000
+
+# Rows per multi-row INSERT in insert_rows, and the import size from which
+# Postgres gets COPY instead
+INSERT_BATCH_ROWS = 500
+COPY_MIN_ROWS = 5000
+
+# Escapes for COPY's text format, where \N is NULL
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# Index types that serve "contains" filters: MySQL FULLTEXT, pg_trgm
+SEARCH_INDEX_TYPES = frozenset({"FULLTEXT", "trigram"})
+# Words of a LIKE '%...%' filter, searched as word prefixes in FULLTEXT
+_SEARCH_WORD_RE = re.compile(r'\w+')
+
+# Fixed introspection statements are built once at import; only their bound
+# parameters vary, so each compiles once into the engine's statement cache.
+_MYSQL_DATABASES_SQL = text("SHOW DATABASES")
+_PG_DATABASES_SQL = text("SELECT datname FROM pg_database WHERE datistemplate = false;")
+
+# Table listings read the table catalog alone; column counts and keys come
+# from get_table_structure when a table is opened
+_MYSQL_TABLES_SQL = text("""
+    SELECT TABLE_NAME, TABLE_ROWS
+    FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+    ORDER BY TABLE_NAME
+""")
+
+_PG_TABLES_SQL = text("""
+    SELECT relname, reltuples::bigint
+    FROM pg_class
+    WHERE relnamespace = current_schema()::regnamespace
+        AND relkind IN ('r', 'p')
+    ORDER BY relname
+""")
+
+# Catalog row estimates, O(1) where COUNT(*) scans the table. NULL (views)
+# or -1 (a Postgres table never analyzed) mean no estimate.
+_MYSQL_APPROX_COUNT_SQL = text("""
+    SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
+""")
+
+_PG_APPROX_COUNT_SQL = text("""
+    SELECT reltuples::bigint FROM pg_class
+    WHERE relname = :table_name AND relnamespace = current_schema()::regnamespace
+""")
+
+# Columns, indexes and foreign keys of tables in a single round trip, each
+# row tagged with its kind and NULL-padded to a common shape:
+# table_name, kind, name, seq, a, b, c, d, e, non_unique.
+# {table_filter} narrows it to one table (see the _SQL constants below).
+_MYSQL_STRUCTURE_TEMPLATE = """
+    SELECT 
+        TABLE_NAME AS table_name,
+        'col' AS kind, COLUMN_NAME AS name, ORDINAL_POSITION AS seq,
+        DATA_TYPE AS a, IS_NULLABLE AS b, COLUMN_DEFAULT AS c,
+        EXTRA AS d, COLUMN_KEY AS e, NULL AS non_unique
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE(){table_filter}
+    UNION ALL
+    SELECT 
+        TABLE_NAME, 'idx', INDEX_NAME, 0,
+        GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX), INDEX_TYPE, NULL,
+        NULL, NULL, NON_UNIQUE
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE(){table_filter}
+    GROUP BY TABLE_NAME, INDEX_NAME, NON_UNIQUE, INDEX_TYPE
+    UNION ALL
+    SELECT 
+        TABLE_NAME, 'fk', CONSTRAINT_NAME, 0,
+        GROUP_CONCAT(COLUMN_NAME ORDER BY ORDINAL_POSITION),
+        REFERENCED_TABLE_NAME,
+        GROUP_CONCAT(REFERENCED_COLUMN_NAME ORDER BY ORDINAL_POSITION),
+        NULL, NULL, NULL
+    FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = DATABASE(){table_filter}
+        AND REFERENCED_TABLE_NAME IS NOT NULL
+    GROUP BY TABLE_NAME, CONSTRAINT_NAME, REFERENCED_TABLE_NAME
+    ORDER BY table_name, kind, seq, name
+"""
+
+# The same for Postgres, read from pg_catalog directly rather than through
+# the information_schema views. Row shape: table_name, kind, name, seq,
+# type, nullable, default, is_pk, columns, referred_table,
+# referred_columns, unique. {relation_filter} picks the tables.
+_PG_STRUCTURE_TEMPLATE = """
+    WITH t AS (
+        SELECT oid, relname FROM pg_class
+        WHERE relnamespace = current_schema()::regnamespace{relation_filter}
+    )
+    SELECT 
+        t.relname AS table_name,
+        'col' AS kind, a.attname AS name, a.attnum AS seq,
+        format_type(a.atttypid, NULL) AS type, NOT a.attnotnull AS nullable,
+        pg_get_expr(d.adbin, d.adrelid) AS "default",
+        COALESCE(a.attnum = ANY(pk.conkey), false) AS is_pk,
+        NULL::text[] AS columns, NULL::text AS referred_table,
+        NULL::text[] AS referred_columns, NULL::boolean AS is_unique
+    FROM t
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+    LEFT JOIN pg_constraint pk ON pk.conrelid = t.oid AND pk.contype = 'p'
+    UNION ALL
+    SELECT 
+        t.relname, 'idx', i.relname, 0,
+        CASE WHEN EXISTS (
+            SELECT 1 FROM pg_opclass opc
+            WHERE opc.oid = ANY(ix.indclass)
+                AND opc.opcname IN ('gin_trgm_ops', 'gist_trgm_ops')
+        ) THEN 'trigram' ELSE am.amname::text END,
+        NULL, NULL, NULL,
+        ARRAY(
+            SELECT a.attname
+            FROM unnest(ix.indkey) WITH ORDINALITY k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        ),
+        NULL, NULL, ix.indisunique
+    FROM t
+    JOIN pg_index ix ON ix.indrelid = t.oid AND NOT ix.indisprimary
+    JOIN pg_class i ON i.oid = ix.indexrelid
+    JOIN pg_am am ON am.oid = i.relam
+    UNION ALL
+    SELECT 
+        t.relname, 'fk', con.conname, 0, NULL, NULL, NULL, NULL,
+        ARRAY(
+            SELECT a.attname
+            FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        ),
+        rc.relname,
+        ARRAY(
+            SELECT a.attname
+            FROM unnest(con.confkey) WITH ORDINALITY k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+            ORDER BY k.ord
+        ),
+        NULL
+    FROM t
+    JOIN pg_constraint con ON con.conrelid = t.oid AND con.contype = 'f'
+    JOIN pg_class rc ON rc.oid = con.confrelid
+    ORDER BY table_name, kind, seq, name
+"""
+
+# One table, and every base table of the schema
+_MYSQL_STRUCTURE_SQL = text(_MYSQL_STRUCTURE_TEMPLATE.format(table_filter=" AND TABLE_NAME = :table_name"))
+_MYSQL_ALL_STRUCTURES_SQL = text(_MYSQL_STRUCTURE_TEMPLATE.format(table_filter=""))
+_PG_STRUCTURE_SQL = text(_PG_STRUCTURE_TEMPLATE.format(relation_filter=" AND relname = :table_name"))
+_PG_ALL_STRUCTURES_SQL = text(_PG_STRUCTURE_TEMPLATE.format(relation_filter=" AND relkind IN ('r', 'p')"))
+
+
+def _empty_structure(table_name):
+    """A get_table_structure result with no columns filed yet."""
+    return {
+        "success": True,
+        "table_name": table_name,
+        "columns": [],
+        "primary_keys": [],
+        "indexes": [],
+        "foreign_keys": []
+    }
+
+
+def _add_mysql_structure_row(structure, row):
+    """Files one row of a MySQL structure query into structure."""
+    _, kind, name, _, a, b, c, d, e, non_unique = row
+    if kind == 'col':
+        structure["columns"].append({
+            "name": name,
+            "type": a,
+            "nullable": b == 'YES',
+            "default": c,
+            "autoincrement": 'auto_increment' in (d or '').lower()
+        })
+        if e == 'PRI':
+            structure["primary_keys"].append(name)
+    elif kind == 'idx':
+        if name != 'PRIMARY':  # Skip primary key index
+            structure["indexes"].append({
+                "name": name,
+                "columns": a.split(',') if a else [],
+                "unique": non_unique == 0,
+                "type": b
+            })
+    else:  # fk
+        structure["foreign_keys"].append({
+            "name": name,
+            "columns": a.split(',') if a else [],
+            "referred_table": b,
+            "referred_columns": c.split(',') if c else []
+        })
+
+
+def _add_pg_structure_row(structure, row):
+    """Files one row of a Postgres structure query into structure."""
+    (_, kind, name, _, type_name, nullable, default, is_pk,
+     cols, referred_table, referred_cols, unique) = row
+    if kind == 'col':
+        structure["columns"].append({
+            "name": name,
+            "type": type_name,
+            "nullable": nullable,
+            "default": default,
+            "autoincrement": 'nextval' in (default or '').lower()
+        })
+        if is_pk:
+            structure["primary_keys"].append(name)
+    elif kind == 'idx':
+        structure["indexes"].append({
+            "name": name,
+            "columns": list(cols) if cols else [],
+            "unique": unique,
+            "type": type_name
+        })
+    else:  # fk
+        structure["foreign_keys"].append({
+            "name": name,
+            "columns": list(cols) if cols else [],
+            "referred_table": referred_table,
+            "referred_columns": list(referred_cols) if referred_cols else []
+        })
+
+
+@functools.lru_cache(maxsize=512)
+def _insert_sql(table_name, columns):
+    """Single-row INSERT for a table and column tuple, built once per shape."""
+    column_list = ', '.join([f"`{k}`" for k in columns])
+    placeholders = ', '.join([f":{k}" for k in columns])
+    return text(f"INSERT INTO `{table_name}` ({column_list}) VALUES ({placeholders})")
+
+
+@functools.lru_cache(maxsize=512)
+def _update_sql(table_name, columns, primary_key_col):
+    """UPDATE of columns by primary key, built once per shape."""
+    set_clause = ', '.join([f"`{k}` = :{k}" for k in columns])
+    return text(f"UPDATE `{table_name}` SET {set_clause} WHERE `{primary_key_col}` = :pk_val")
+
+
+@functools.lru_cache(maxsize=512)
+def _delete_sql(table_name, primary_key_col):
+    """DELETE by primary key, built once per table and key column."""
+    return text(f"DELETE FROM `{table_name}` WHERE `{primary_key_col}` = :pk_val")
+
+
+def _copy_value(val):
+    """Renders a value as a field of COPY's text format."""
+    if val is None:
+        return "\\N"
+    return str(val).translate(_COPY_ESCAPES)
+
 
 class TableManager:
     def __init__(self, db_connector):
         self.db_connector = db_connector
+        # (generation, db_type, database, *key) -> (monotonic time, result)
+        self._metadata_cache = {}
+        self._metadata_generation = None
+        # (database, table, filters) -> (monotonic time, exact row count)
+        self._count_cache = {}
+
+    def _cached(self, key, fn, ttl=METADATA_TTL):
+        """
+        fn()'s result, reused for ttl seconds per database and key. Failures
+        aren't kept, and everything is dropped when the schema is re-read.
+        """
+        generation = self.db_connector.schema_generation
+        if generation != self._metadata_generation:
+            self._metadata_cache = {}
+            self._metadata_generation = generation
+        key = (generation, self.db_connector.db_type, self.db_connector.engine.url.database) + key
+
+        now = time.monotonic()
+        hit = self._metadata_cache.get(key)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+        result = fn()
+        if result.get("success"):
+            self._metadata_cache[key] = (now, result)
+        return result
+
+    def _approximate_count(self, conn, table_name):
+        """The catalog's row estimate for a table, or None if it has none."""
+        if self.db_connector.db_type == "mysql":
+            query = _MYSQL_APPROX_COUNT_SQL
+        else:
+            query = _PG_APPROX_COUNT_SQL
+        count = conn.execute(query, {"table_name": table_name}).scalar()
+        return count if count is not None and count >= 0 else None
+
+    def _exact_count(self, conn, table_name, where_stmt, params, filters):
+        """
+        COUNT(*) of the matching rows. Filtered counts stop at
+        FILTER_COUNT_CAP + 1 and are reused for COUNT_TTL seconds, so
+        re-sorting or paging doesn't re-scan.
+        """
+        if not filters:
+            count_query = f"SELECT COUNT(*) as cnt FROM `{table_name}`"
+            return conn.execute(text(count_query), params).scalar()
+        count_query = (
+            f"SELECT COUNT(*) as cnt FROM "
+            f"(SELECT 1 FROM `{table_name}` {where_stmt} LIMIT {FILTER_COUNT_CAP + 1}) capped"
+        )
+
+        # The WHERE text tells apart filters rendered differently (LIKE or
+        # a FULLTEXT MATCH for the same value); filters carry the values
+        key = (self.db_connector.engine.url.database, table_name, where_stmt,
+               tuple(sorted(filters.items())))
+        now = time.monotonic()
+        hit = self._count_cache.get(key)
+        if hit and now - hit[0] < COUNT_TTL:
+            return hit[1]
+
+        count = conn.execute(text(count_query), params).scalar()
+        if len(self._count_cache) >= COUNT_CACHE_SIZE:
+            self._count_cache = {}
+        self._count_cache[key] = (now, count)
+        return count
+
+    def _column_names(self, table_name):
+        """
+        A table's column names as a frozenset, cached with its structure.
+        Raises ValueError for an unknown table.
+        """
+        def fetch():
+            structure = self.get_table_structure(table_name)
+            if not structure["success"]:
+                return structure
+            if not structure["columns"]:
+                # Not cached: the table may be created any moment
+                return {"success": False, "error": f"Unknown table: {table_name}"}
+            return {"success": True, "names": frozenset(c["name"] for c in structure["columns"])}
+
+        result = self._cached(("column_names", table_name), fetch)
+        if not result["success"]:
+            raise ValueError(result["error"])
+        return result["names"]
+
+    def _search_columns(self, table_name):
+        """
+        Columns of a table with a single-column FULLTEXT or trigram index,
+        as a frozenset. Cached with the structure.
+        """
+        def fetch():
+            structure = self.get_table_structure(table_name)
+            if not structure["success"]:
+                return structure
+            return {"success": True, "names": frozenset(
+                idx["columns"][0] for idx in structure["indexes"]
+                if len(idx["columns"]) == 1 and idx.get("type") in SEARCH_INDEX_TYPES
+            )}
 
+        result = self._cached(("search_columns", table_name), fetch)
+        return result["names"] if result["success"] else frozenset()
 
+    def _check_columns(self, table_name, names):
+        """
+        Raises ValueError unless table_name exists and has every column in
+        names, so both can go into SQL as they are.
+        """
+        legal = self._column_names(table_name)
+        for name in names:
+            if name not in legal:
+                raise ValueError(f"Unknown column: {name}")
+
+    def _forget_counts(self, table_name):
+        """Drops a table's cached counts once its rows have changed."""
+        self._count_cache = {
+            key: hit for key, hit in self._count_cache.items() if key[1] != table_name
+        }
 
     def get_databases(self):
         """Get list of all available databases."""
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
-            
+
+        # (Re)connecting bumps the schema generation, which drops it
+        return self._cached(("databases",), self._fetch_databases, ttl=DATABASES_TTL)
+
+    def _fetch_databases(self):
         try:
             databases = []
-            with self.db_connector.engine.connect() as conn:
+            with self.db_connector.get_conn() as conn:
                 if self.db_connector.db_type == "mysql":
-                    query = "SHOW DATABASES"
-                    result = conn.execute(text(query))
+                    query = _MYSQL_DATABASES_SQL
+                    result = conn.execute(query)
                     # Filter out system databases
                     system_dbs = {'information_schema', 'mysql', 'performance_schema', 'sys'}
-                    databases = [row[0] for row in result.fetchall() if row[0] not in system_dbs]
+                    databases = [name for name in result.scalars() if name not in system_dbs]
                 else: # postgresql
-                    query = "SELECT datname FROM pg_database WHERE datistemplate = false;"
-                    result = conn.execute(text(query))
-                    databases = [row[0] for row in result.fetchall()]
+                    query = _PG_DATABASES_SQL
+                    result = conn.execute(query)
+                    databases = list(result.scalars())
             
             return {"success": True, "databases": sorted(databases)}
         except Exception as e:
@@ -43,68 +430,26 @@ class TableManager:
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
 
+        return self._cached(("tables",), self._fetch_tables)
+
+    def _fetch_tables(self):
         try:
             tables = []
             
             if self.db_connector.db_type == "mysql":
-                # Single query to get all tables with column counts and primary keys
-                query = """
-                    SELECT 
-                        t.TABLE_NAME,
-                        t.TABLE_ROWS,
-                        COUNT(c.COLUMN_NAME) as column_count,
-                        GROUP_CONCAT(
-                            CASE WHEN c.COLUMN_KEY = 'PRI' THEN c.COLUMN_NAME END
-                        ) as primary_keys
-                    FROM INFORMATION_SCHEMA.TABLES t
-                    LEFT JOIN INFORMATION_SCHEMA.COLUMNS c 
-                        ON t.TABLE_NAME = c.TABLE_NAME 
-                        AND t.TABLE_SCHEMA = c.TABLE_SCHEMA
-                    WHERE t.TABLE_SCHEMA = DATABASE()
-                        AND t.TABLE_TYPE = 'BASE TABLE'
-                        AND t.TABLE_SCHEMA NOT IN ('information_schema', 'mysql', 'performance_schema', 'sys')
-                    GROUP BY t.TABLE_NAME, t.TABLE_ROWS
-                    ORDER BY t.TABLE_NAME
-                """
+                query = _MYSQL_TABLES_SQL
             else:  # postgresql
-                query = """
-                    SELECT 
-                        t.table_name,
-                        COUNT(c.column_name) as column_count,
-                        STRING_AGG(
-                            CASE WHEN pk.column_name IS NOT NULL THEN c.column_name END, ','
-                        ) as primary_keys
-                    FROM information_schema.tables t
-                    LEFT JOIN information_schema.columns c 
-                        ON t.table_name = c.table_name 
-                        AND t.table_schema = c.table_schema
-                    LEFT JOIN (
-                        SELECT ku.table_name, ku.column_name
-                        FROM information_schema.table_constraints tc
-                        JOIN information_schema.key_column_usage ku 
-                            ON tc.constraint_name = ku.constraint_name
-                        WHERE tc.constraint_type = 'PRIMARY KEY'
-                            AND tc.table_schema = current_schema()
-                    ) pk ON c.table_name = pk.table_name AND c.column_name = pk.column_name
-                    WHERE t.table_schema = current_schema()  -- Usually 'public'
-                        AND t.table_type = 'BASE TABLE'
-                        AND t.table_schema NOT IN ('information_schema', 'pg_catalog') 
-                    GROUP BY t.table_name
-                    ORDER BY t.table_name
-                """
+                query = _PG_TABLES_SQL
             
-            with self.db_connector.engine.connect() as conn:
-                result = conn.execute(text(query))
-                for row in result.fetchall():
-                    pk_str = row[2] if self.db_connector.db_type == "mysql" else row[2]
-                    pk_index = 3 if self.db_connector.db_type == "mysql" else 2
-                    pk_str = row[pk_index]
-                    primary_keys = [pk for pk in (pk_str.split(',') if pk_str else []) if pk]
-                    
+            with self.db_connector.get_conn() as conn:
+                result = conn.execute(query)
+                for name, row_count in result.fetchall():
                     tables.append({
-                        "name": row[0],
-                        "column_count": row[2] if self.db_connector.db_type == "mysql" else row[1],
-                        "primary_keys": primary_keys
+                        "name": name,
+                        # Catalog estimate; None (or -1 on Postgres) if unknown
+                        "row_count": row_count,
+                        "column_count": None,
+                        "primary_keys": []
                     })
             
             return {"success": True, "tables": tables}
@@ -117,179 +462,95 @@ class TableManager:
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
 
+        return self._cached(("structure", table_name), lambda: self._fetch_table_structure(table_name))
+
+    def _fetch_table_structure(self, table_name):
         try:
-            columns = []
-            primary_keys = []
-            indexes = []
-            foreign_keys = []
+            structure = _empty_structure(table_name)
             
-            with self.db_connector.engine.connect() as conn:
+            with self.db_connector.get_conn() as conn:
+                # Columns, indexes and foreign keys in one round trip
                 if self.db_connector.db_type == "mysql":
-                    # Get columns
-                    col_query = """
-                        SELECT 
-                            COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT,
-                            EXTRA, COLUMN_KEY
-                        FROM INFORMATION_SCHEMA.COLUMNS
-                        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
-                        ORDER BY ORDINAL_POSITION
-                    """
-                    result = conn.execute(text(col_query), {"table_name": table_name})
-                    for row in result.fetchall():
-                        columns.append({
-                            "name": row[0],
-                            "type": row[1],
-                            "nullable": row[2] == 'YES',
-                            "default": row[3],
-                            "autoincrement": 'auto_increment' in (row[4] or '').lower()
-                        })
-                        if row[5] == 'PRI':
-                            primary_keys.append(row[0])
-                    
-                    # Get indexes
-                    idx_query = """
-                        SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX), NON_UNIQUE
-                        FROM INFORMATION_SCHEMA.STATISTICS
-                        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name
-                        GROUP BY INDEX_NAME, NON_UNIQUE
-                    """
-                    result = conn.execute(text(idx_query), {"table_name": table_name})
+                    result = conn.execute(_MYSQL_STRUCTURE_SQL, {"table_name": table_name})
                     for row in result.fetchall():
-                        if row[0] != 'PRIMARY':  # Skip primary key index
-                            indexes.append({
-                                "name": row[0],
-                                "columns": row[1].split(',') if row[1] else [],
-                                "unique": row[2] == 0
-                            })
-                    
-                    # Get foreign keys
-                    fk_query = """
-                        SELECT 
-                            CONSTRAINT_NAME,
-                            GROUP_CONCAT(COLUMN_NAME ORDER BY ORDINAL_POSITION),
-                            REFERENCED_TABLE_NAME,
-                            GROUP_CONCAT(REFERENCED_COLUMN_NAME ORDER BY ORDINAL_POSITION)
-                        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                        WHERE TABLE_SCHEMA = DATABASE() 
-                            AND TABLE_NAME = :table_name
-                            AND REFERENCED_TABLE_NAME IS NOT NULL
-                        GROUP BY CONSTRAINT_NAME, REFERENCED_TABLE_NAME
-                    """
-                    result = conn.execute(text(fk_query), {"table_name": table_name})
-                    for row in result.fetchall():
-                        foreign_keys.append({
-                            "name": row[0],
-                            "columns": row[1].split(',') if row[1] else [],
-                            "referred_table": row[2],
-                            "referred_columns": row[3].split(',') if row[3] else []
-                        })
-                
+                        _add_mysql_structure_row(structure, row)
                 else:  # postgresql
-                    # Get columns
-                    col_query = """
-                        SELECT 
-                            c.column_name, c.data_type, c.is_nullable, c.column_default,
-                            CASE WHEN pk.column_name IS NOT NULL THEN true ELSE false END as is_pk
-                        FROM information_schema.columns c
-                        LEFT JOIN (
-                            SELECT ku.column_name
-                            FROM information_schema.table_constraints tc
-                            JOIN information_schema.key_column_usage ku 
-                                ON tc.constraint_name = ku.constraint_name
-                            WHERE tc.constraint_type = 'PRIMARY KEY'
-                                AND tc.table_schema = current_schema()
-                                AND tc.table_name = :table_name
-                        ) pk ON c.column_name = pk.column_name
-                        WHERE c.table_schema = current_schema() AND c.table_name = :table_name
-                        ORDER BY c.ordinal_position
-                    """
-                    result = conn.execute(text(col_query), {"table_name": table_name})
+                    result = conn.execute(_PG_STRUCTURE_SQL, {"table_name": table_name})
                     for row in result.fetchall():
-                        columns.append({
-                            "name": row[0],
-                            "type": row[1],
-                            "nullable": row[2] == 'YES',
-                            "default": row[3],
-                            "autoincrement": 'nextval' in (row[3] or '').lower()
-                        })
-                        if row[4]:
-                            primary_keys.append(row[0])
-                    
-                    # Get indexes
-                    idx_query = """
-                        SELECT i.relname, array_agg(a.attname), ix.indisunique
-                        FROM pg_class t
-                        JOIN pg_index ix ON t.oid = ix.indrelid
-                        JOIN pg_class i ON i.oid = ix.indexrelid
-                        JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
-                        WHERE t.relname = :table_name AND NOT ix.indisprimary
-                        GROUP BY i.relname, ix.indisunique
-                    """
-                    result = conn.execute(text(idx_query), {"table_name": table_name})
-                    for row in result.fetchall():
-                        indexes.append({
-                            "name": row[0],
-                            "columns": list(row[1]) if row[1] else [],
-                            "unique": row[2]
-                        })
-                    
-                    # Get foreign keys
-                    fk_query = """
-                        SELECT 
-                            tc.constraint_name,
-                            array_agg(kcu.column_name),
-                            ccu.table_name,
-                            array_agg(ccu.column_name)
-                        FROM information_schema.table_constraints tc
-                        JOIN information_schema.key_column_usage kcu 
-                            ON tc.constraint_name = kcu.constraint_name
-                        JOIN information_schema.constraint_column_usage ccu 
-                            ON ccu.constraint_name = tc.constraint_name
-                        WHERE tc.constraint_type = 'FOREIGN KEY'
-                            AND tc.table_schema = current_schema()
-                            AND tc.table_name = :table_name
-                        GROUP BY tc.constraint_name, ccu.table_name
-                    """
-                    result = conn.execute(text(fk_query), {"table_name": table_name})
-                    for row in result.fetchall():
-                        foreign_keys.append({
-                            "name": row[0],
-                            "columns": list(row[1]) if row[1] else [],
-                            "referred_table": row[2],
-                            "referred_columns": list(row[3]) if row[3] else []
-                        })
+                        _add_pg_structure_row(structure, row)
             
-            return {
-                "success": True,
-                "table_name": table_name,
-                "columns": columns,
-                "primary_keys": primary_keys,
-                "indexes": indexes,
-                "foreign_keys": foreign_keys
-            }
+            return structure
         except Exception as e:
             logger.error(f"Failed to get table structure: {e}")
             return {"success": False, "error": str(e)}
 
-    def get_table_data(self, table_name, page=1, per_page=25, order_by=None, order_dir='asc', filters=None):
-        """Get paginated table data with optional filtering."""
+    def get_all_table_structures(self):
+        """
+        Structures of every table in the database, from one query instead
+        of one per table. Also fills the per-table structure cache.
+        """
+        if not self.db_connector.engine:
+            return {"success": False, "error": "Not connected to database"}
+
+        return self._cached(("all_structures",), self._fetch_all_table_structures)
+
+    def _fetch_all_table_structures(self):
+        try:
+            structures = {}
+            
+            with self.db_connector.get_conn() as conn:
+                if self.db_connector.db_type == "mysql":
+                    result = conn.execute(_MYSQL_ALL_STRUCTURES_SQL)
+                    add_row = _add_mysql_structure_row
+                else:  # postgresql
+                    result = conn.execute(_PG_ALL_STRUCTURES_SQL)
+                    add_row = _add_pg_structure_row
+                for row in result.fetchall():
+                    structure = structures.get(row[0])
+                    if structure is None:
+                        structure = structures[row[0]] = _empty_structure(row[0])
+                    add_row(structure, row)
+            
+            # Warm the per-table cache so opening a table costs nothing
+            for table_name, structure in structures.items():
+                self._cached(("structure", table_name), lambda structure=structure: structure)
+            
+            return {"success": True, "tables": structures}
+        except Exception as e:
+            logger.error(f"Failed to get table structures: {e}")
+            return {"success": False, "error": str(e)}
+
+    def get_table_data(self, table_name, page=1, per_page=25, order_by=None, order_dir='asc', filters=None,
+                       key_column=None, after=None, before=None, columnar=False, word_search=False):
+        """
+        Get paginated table data with optional filtering.
+        With a single-column primary key as key_column, rows are ordered by it
+        and pagination.next_cursor / prev_cursor are returned; passing them
+        back as after / before seeks past them instead of skipping OFFSET
+        rows. page is only used without a cursor.
+        With columnar=True rows are value arrays ordered like "columns"
+        instead of one dict per row.
+        With word_search=True, "contains" filters on MySQL FULLTEXT-indexed
+        columns match word prefixes through the index rather than substrings.
+        """
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
 
         try:
             offset = (page - 1) * per_page
             
-            # Build query - escape table name for safety
-            # Note: In production, validate table_name against known tables
+            # Table and every column named by the request must exist
+            self._check_columns(table_name, [order_by] if order_by else [])
+            if filters:
+                self._check_columns(table_name, filters)
             
             where_clauses = []
             params = {}
             display_where_clauses = [] # For the UI string
             
             if filters:
-                for col, val in filters.items():
-                    clean_col = col.replace("`", "") # Basic sanitization
-                    param_name = f"filter_{clean_col}"
+                for i, (col, val) in enumerate(filters.items()):
+                    param_name = f"filter_{i}"
                     
                     # Parse operator from value if present
                     # Front end sends format: "OPERATOR value" or just "value" (default to LIKE)
@@ -312,26 +573,63 @@ class TableManager:
                     
                     # Construct clause based on operator
                     if operator in ['IS NULL', 'IS NOT NULL']:
-                        clause = f"`{clean_col}` {operator}"
+                        clause = f"`{col}` {operator}"
                         where_clauses.append(clause)
                         display_where_clauses.append(clause)
                     else:
-                        clause = f"`{clean_col}` {operator} :{param_name}"
-                        where_clauses.append(clause)
+                        clause = f"`{col}` {operator} :{param_name}"
                         
                         # Handle value formatting for LIKE if not already present
                         if operator == 'LIKE':
                             # Frontend usually sends "%val%" but let's be safe. 
                             # Actually frontend sends "LIKE %val%" so filter_val has "%val%" already.
-                            pass
+                            # When asked for, a FULLTEXT index answers
+                            # "contains" on MySQL where LIKE '%...%' has to
+                            # scan. It matches word prefixes, not substrings,
+                            # so it is opt-in. (On Postgres a trigram index
+                            # serves LIKE as it is.)
+                            words = _SEARCH_WORD_RE.findall(filter_val) if word_search else None
+                            if (self.db_connector.db_type == "mysql" and words
+                                    and filter_val.startswith('%') and filter_val.endswith('%')
+                                    and col in self._search_columns(table_name)):
+                                clause = f"MATCH(`{col}`) AGAINST(:{param_name} IN BOOLEAN MODE)"
+                                filter_val = " ".join(f"+{word}*" for word in words)
                         
+                        where_clauses.append(clause)
                         params[param_name] = filter_val
                         
                         # Interpolate for display
                         # Simple escaping for display purposes
                         display_val = str(filter_val).replace("'", "''")
-                        display_where_clauses.append(f"`{clean_col}` {operator} '{display_val}'")
+                        display_where_clauses.append(clause.replace(f":{param_name}", f"'{display_val}'"))
             
+            # The total counts every filtered row, wherever the cursor is
+            count_where_stmt = ""
+            if where_clauses:
+                count_where_stmt = "WHERE " + " AND ".join(where_clauses)
+
+            # Keyset pagination applies while rows are ordered by the key
+            keyset = key_column is not None and order_by in (None, key_column)
+            # Paging back with before reads the preceding rows in reverse
+            # order, then flips them
+            backward = False
+            if keyset:
+                order_by = key_column
+                descending = order_dir.lower() == 'desc'
+                cursor = after
+                if after is None and before is not None:
+                    cursor = before
+                    backward = True
+                    descending = not descending
+                    order_dir = 'desc' if descending else 'asc'
+                if cursor is not None:
+                    op = "<" if descending else ">"
+                    where_clauses.append(f"`{key_column}` {op} :cursor_pk")
+                    params["cursor_pk"] = cursor
+                    display_val = str(cursor).replace("'", "''")
+                    display_where_clauses.append(f"`{key_column}` {op} '{display_val}'")
+                    offset = 0
+
             where_stmt = ""
             display_where_stmt = ""
             
@@ -344,25 +642,79 @@ class TableManager:
                 direction = "DESC" if order_dir.lower() == 'desc' else "ASC"
                 order_clause = f" ORDER BY `{order_by}` {direction}"
             
-            # Get total count
-            count_query = f"SELECT COUNT(*) as cnt FROM `{table_name}` {where_stmt}"
-            
             # Get data with pagination
-            data_query = f"SELECT * FROM `{table_name}` {where_stmt}{order_clause} LIMIT {per_page} OFFSET {offset}"
-            display_query = f"SELECT * FROM `{table_name}` {display_where_stmt}{order_clause} LIMIT {per_page} OFFSET {offset}"
+            # Bound, so every page of a view shares one statement text. Keyset
+            # pages read one row extra to tell whether another page follows.
+            fetch_limit = per_page + 1 if keyset else per_page
+            limit_clause = " LIMIT :page_limit" + (" OFFSET :page_offset" if offset else "")
+            params["page_limit"] = fetch_limit
+            params["page_offset"] = offset
+            display_limit_clause = f" LIMIT {fetch_limit}" + (f" OFFSET {offset}" if offset else "")
+            data_query = f"SELECT * FROM `{table_name}` {where_stmt}{order_clause}{limit_clause}"
+            display_query = f"SELECT * FROM `{table_name}` {display_where_stmt}{order_clause}{display_limit_clause}"
             
             start_time = time.time()
-            with self.db_connector.engine.connect() as conn:
-                # Get count
-                count_result = conn.execute(text(count_query), params)
-                total_count = count_result.fetchone()[0]
+            with self.db_connector.get_conn() as conn:
+                # Get count: unfiltered, a large table's catalog estimate
+                # stands in for a full scan
+                total_count = None
+                if not filters:
+                    total_count = self._approximate_count(conn, table_name)
+                    if total_count is not None and total_count < APPROX_COUNT_MIN_ROWS:
+                        total_count = None
+                approximate = total_count is not None
+                if not approximate:
+                    total_count = self._exact_count(conn, table_name, count_where_stmt, params, filters)
+                    if filters and total_count > FILTER_COUNT_CAP:
+                        total_count = FILTER_COUNT_CAP
+                        approximate = True
                 
-                # Get data
-                result = conn.execute(text(data_query), params)
-                columns = list(result.keys())
-                rows = [dict(zip(columns, row)) for row in result.fetchall()]
+                # Get data. Pages over STREAM_FETCH_ROWS come through a
+                # server-side cursor a partition at a time, so the driver
+                # never buffers the whole page alongside its dicts.
+                if per_page > STREAM_FETCH_ROWS:
+                    result = conn.execute(
+                        text(data_query), params,
+                        execution_options={"stream_results": True, "yield_per": STREAM_FETCH_ROWS}
+                    )
+                    columns = list(result.keys())
+                    rows = []
+                    for partition in result.partitions():
+                        if columnar:
+                            rows.extend(map(tuple, partition))
+                        else:
+                            rows.extend(dict(zip(columns, row)) for row in partition)
+                else:
+                    result = conn.execute(text(data_query), params)
+                    columns = list(result.keys())
+                    if columnar:
+                        rows = list(map(tuple, result.fetchall()))
+                    else:
+                        rows = [dict(zip(columns, row)) for row in result.fetchall()]
                 
                 total_pages = (total_count + per_page - 1) // per_page
+
+                # The extra row only says there is more in the read direction
+                more = len(rows) > per_page
+                if more:
+                    rows.pop()
+                if backward:
+                    rows.reverse()
+
+                next_cursor = None
+                prev_cursor = None
+                if keyset and rows:
+                    key = columns.index(key_column) if columnar else key_column
+                    if backward:
+                        # Rows after this page are the ones paged back from
+                        next_cursor = rows[-1][key]
+                        if more:
+                            prev_cursor = rows[0][key]
+                    else:
+                        if more:
+                            next_cursor = rows[-1][key]
+                        if after is not None or offset:
+                            prev_cursor = rows[0][key]
                 
                 end_time = time.time()
                 execution_time = (end_time - start_time)
@@ -378,7 +730,10 @@ class TableManager:
                         "page": page,
                         "per_page": per_page,
                         "total_count": total_count,
-                        "total_pages": total_pages
+                        "total_pages": total_pages,
+                        "total_count_approximate": approximate,
+                        "next_cursor": next_cursor,
+                        "prev_cursor": prev_cursor
                     }
                 }
         except Exception as e:
@@ -391,33 +746,136 @@ class TableManager:
             return {"success": False, "error": "Not connected to database"}
 
         try:
-            columns = ', '.join([f"`{k}`" for k in data.keys()])
-            placeholders = ', '.join([f":{k}" for k in data.keys()])
-            query = f"INSERT INTO `{table_name}` ({columns}) VALUES ({placeholders})"
+            self._check_columns(table_name, data)
+            query = _insert_sql(table_name, tuple(data))
             
-            with self.db_connector.engine.connect() as conn:
-                conn.execute(text(query), data)
+            with self.db_connector.get_conn() as conn:
+                conn.execute(query, data)
                 conn.commit()
+                self._forget_counts(table_name)
                 
             return {"success": True, "message": "Row inserted successfully"}
         except Exception as e:
             logger.error(f"Failed to insert row: {e}")
             return {"success": False, "error": str(e)}
 
+    def insert_rows(self, table_name, rows):
+        """
+        Insert many rows in one transaction, INSERT_BATCH_ROWS per INSERT
+        (COPY for large imports on Postgres). Columns missing from a row get
+        NULL.
+        """
+        if not self.db_connector.engine:
+            return {"success": False, "error": "Not connected to database"}
+
+        try:
+            # Every key any row has, in first-seen order
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+            self._check_columns(table_name, columns)
+            
+            with self.db_connector.get_conn() as conn:
+                # An explicit transaction, so COPY on the raw DBAPI cursor (which
+                # SQLAlchemy never sees) is committed along with the INSERTs
+                with conn.begin():
+                    if self.db_connector.db_type == "postgresql" and len(rows) >= COPY_MIN_ROWS:
+                        self._copy_rows(conn, table_name, columns, rows)
+                    elif columns:
+                        quote = conn.dialect.identifier_preparer.quote_identifier
+                        prefix = f"INSERT INTO {quote(table_name)} ({', '.join(map(quote, columns))}) VALUES "
+                        for start in range(0, len(rows), INSERT_BATCH_ROWS):
+                            batch = rows[start:start + INSERT_BATCH_ROWS]
+                            params = {}
+                            values = []
+                            for i, row in enumerate(batch):
+                                names = []
+                                for j, col in enumerate(columns):
+                                    name = f"c{j}_{i}"
+                                    params[name] = row.get(col)
+                                    names.append(f":{name}")
+                                values.append(f"({', '.join(names)})")
+                            conn.execute(text(prefix + ", ".join(values)), params)
+                self._forget_counts(table_name)
+                
+            return {"success": True, "message": f"{len(rows)} rows inserted successfully", "rows_inserted": len(rows)}
+        except Exception as e:
+            logger.error(f"Failed to insert rows: {e}")
+            return {"success": False, "error": str(e)}
+
+    def _copy_rows(self, conn, table_name, columns, rows):
+        """Loads rows into a Postgres table with COPY FROM STDIN."""
+        quote = conn.dialect.identifier_preparer.quote_identifier
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row.get(col)) for col in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        copy_sql = f"COPY {quote(table_name)} ({', '.join(map(quote, columns))}) FROM STDIN"
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(copy_sql, buffer)
+        finally:
+            cursor.close()
+
+    def batch_mutate(self, ops):
+        """
+        Apply a list of row edits in one transaction, committed once. Each
+        op is {"op": "insert", "table", "data"}, {"op": "update", "table",
+        "pk_column", "pk_value", "data"} or {"op": "delete", "table",
+        "pk_column", "pk_value"}. Any failure rolls back the whole batch.
+        """
+        if not self.db_connector.engine:
+            return {"success": False, "error": "Not connected to database"}
+
+        try:
+            # Check and build every statement before the transaction opens
+            statements = []
+            for op in ops:
+                kind = op.get("op")
+                table_name = op.get("table")
+                data = op.get("data") or {}
+                if kind == "insert":
+                    self._check_columns(table_name, data)
+                    statements.append((table_name, _insert_sql(table_name, tuple(data)), data))
+                elif kind == "update":
+                    self._check_columns(table_name, [op.get("pk_column"), *data])
+                    query = _update_sql(table_name, tuple(data), op["pk_column"])
+                    statements.append((table_name, query, {**data, "pk_val": op.get("pk_value")}))
+                elif kind == "delete":
+                    self._check_columns(table_name, [op.get("pk_column")])
+                    query = _delete_sql(table_name, op["pk_column"])
+                    statements.append((table_name, query, {"pk_val": op.get("pk_value")}))
+                else:
+                    raise ValueError(f"Unknown operation: {kind}")
+            
+            rows_affected = 0
+            with self.db_connector.get_conn() as conn, conn.begin():
+                for _, query, params in statements:
+                    rows_affected += conn.execute(query, params).rowcount
+            
+            for table_name in {table_name for table_name, _, _ in statements}:
+                self._forget_counts(table_name)
+            
+            return {"success": True, "message": f"{len(statements)} operations applied", "rows_affected": rows_affected}
+        except Exception as e:
+            logger.error(f"Failed to apply batch: {e}")
+            return {"success": False, "error": str(e)}
+
     def update_row(self, table_name, primary_key_col, primary_key_val, data):
         """Update a row in the table."""
         if not self.db_connector.engine:
             return {"success": False, "error": "Not connected to database"}
 
         try:
-            set_clause = ', '.join([f"`{k}` = :{k}" for k in data.keys()])
-            query = f"UPDATE `{table_name}` SET {set_clause} WHERE `{primary_key_col}` = :pk_val"
+            self._check_columns(table_name, [primary_key_col, *data])
+            query = _update_sql(table_name, tuple(data), primary_key_col)
             
             params = {**data, "pk_val": primary_key_val}
             
-            with self.db_connector.engine.connect() as conn:
-                result = conn.execute(text(query), params)
+            with self.db_connector.get_conn() as conn:
+                result = conn.execute(query, params)
                 conn.commit()
+                self._forget_counts(table_name)
                 
             return {"success": True, "message": "Row updated successfully", "rows_affected": result.rowcount}
         except Exception as e:
@@ -430,11 +888,13 @@ class TableManager:
             return {"success": False, "error": "Not connected to database"}
 
         try:
-            query = f"DELETE FROM `{table_name}` WHERE `{primary_key_col}` = :pk_val"
+            self._check_columns(table_name, [primary_key_col])
+            query = _delete_sql(table_name, primary_key_col)
             
-            with self.db_connector.engine.connect() as conn:
-                result = conn.execute(text(query), {"pk_val": primary_key_val})
+            with self.db_connector.get_conn() as conn:
+                result = conn.execute(query, {"pk_val": primary_key_val})
                 conn.commit()
+                self._forget_counts(table_name)
                 
             return {"success": True, "message": "Row deleted successfully", "rows_affected": result.rowcount}
         except Exception as e:
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+from db_connector import DBConnector
+
+@pytest.fixture
+def db_connector():
+    db_connector = DBConnector()
+    db_connector.engine = create_engine("sqlite://", poolclass=StaticPool)
+    db_connector.db_type = "mysql"
+    with db_connector.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("CREATE TABLE tags (user_id INTEGER, tag TEXT, PRIMARY KEY (user_id, tag))"))
+    yield db_connector
+    db_connector.engine.dispose()
+
+def test_key_column(db_connector):
+    assert db_connector.get_key_column("users") == "id"
+    # Composite keys can't drive keyset pagination
+    assert db_connector.get_key_column("tags") is None
+    assert db_connector.get_primary_keys("tags") == ["user_id", "tag"]
+    assert db_connector.get_primary_keys("missing") is None
+
+def test_primary_keys_reread_after_schema_change(db_connector):
+    assert db_connector.get_key_column("orders") is None
+
+    with db_connector.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE orders (order_id INTEGER PRIMARY KEY)"))
+    # Still the cached answer until the schema cache is cleared
+    assert db_connector.get_key_column("orders") is None
+
+    db_connector.clear_schema_cache()
+    assert db_connector.get_key_column("orders") == "order_id"
+
+@pytest.fixture
+def stream_options(db_connector):
+    # stream_results of each statement sent to the driver
+    options = []
+    event.listen(db_connector.engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, parameters, context, executemany:
+                 options.append(context.execution_options.get("stream_results", False)))
+    return options
+
+def test_select_streams(db_connector, stream_options):
+    result = db_connector.execute_query("  select * FROM users")
+    assert result["success"], result.get("error")
+    assert stream_options == [True]
+
+def test_explain_returns_rows_without_streaming(db_connector, stream_options):
+    # Postgres can't DECLARE a server-side cursor for EXPLAIN or SHOW
+    result = db_connector.execute_query("EXPLAIN SELECT * FROM users")
+    assert result["success"], result.get("error")
+    assert result["row_count"] > 0
+    assert stream_options == [False]
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy import JSON, Column, Integer, MetaData, Table, create_engine, text
+from export_manager import ExportManager, _plain_row
+
+DOCS = [
+    {"id": 1, "body": {"name": "Alice", "tags": ["a", "b"]}},
+    {"id": 2, "body": [1, 2, 3]},
+    {"id": 3, "body": None},
+]
+
+@pytest.fixture
+def export_manager():
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    docs = Table("docs", metadata,
+                 Column("id", Integer, primary_key=True),
+                 Column("body", JSON))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(docs.insert(), DOCS)
+
+    db_connector = MagicMock()
+    db_connector.engine = engine
+    db_connector.db_type = "sqlite"
+    db_connector.get_table_names.return_value = ["docs"]
+    db_connector.get_conn.side_effect = engine.connect
+    yield ExportManager(db_connector)
+    engine.dispose()
+
+def test_csv_export_round_trips_json_column(export_manager):
+    content, error = export_manager.export_to_csv("docs")
+    assert error is None
+
+    rows = list(csv.reader(io.StringIO(content)))
+    assert rows[0] == ["id", "body"]
+    exported = {int(row[0]): row[1] for row in rows[1:]}
+    assert json.loads(exported[1]) == DOCS[0]["body"]
+    assert json.loads(exported[2]) == DOCS[1]["body"]
+
+def test_plain_row_serializes_decoded_json():
+    # psycopg2 decodes json/jsonb columns itself, even for untyped queries
+    row = (1, {"name": "Alice"}, [1, 2], "text", None)
+    assert _plain_row(row) == (1, '{"name": "Alice"}', "[1, 2]", "text", None)
+
+def test_sql_export_renders_json_as_text(export_manager):
+    content, error = export_manager.export_to_sql("docs")
+    assert error is None
+    assert """(1, '{"name": "Alice", "tags": ["a", "b"]}')""" in content
+    assert "(2, '[1, 2, 3]')" in content
+
+def test_database_export_marks_skipped_table(export_manager):
+    export_manager.db_connector.get_table_names.return_value = ["missing", "docs"]
+
+    content, error = export_manager.export_database_sql()
+    assert error is None
+    assert "-- ERROR: table `missing` skipped" in content
+    assert "INSERT INTO \"docs\"" in content
+
+def test_database_export_aborts_after_partial_table(export_manager, monkeypatch):
+    export_manager.db_connector.db_type = "mysql"
+    monkeypatch.setattr("export_manager._show_create_table_sql",
+                        lambda table: text("SELECT 'docs', 'CREATE TABLE docs (id INT)'"))
+
+    def fail(row):
+        raise ValueError("cannot render")
+    monkeypatch.setattr("export_manager._row_renderer", lambda conn: fail)
+
+    chunks, error = export_manager.stream_database_sql()
+    assert error is None
+    written = []
+    with pytest.raises(ValueError):
+        for chunk in chunks:
+            written.append(chunk)
+    content = "".join(written)
+    assert "DROP TABLE IF EXISTS `docs`" in content
+    assert "-- ERROR: export aborted in table `docs`: cannot render" in content
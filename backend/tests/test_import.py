@@ -0,0 +1,104 @@
+import io
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from db_connector import DBConnector
+from import_manager import ImportManager, _TOKENS_RE
+
+SPLIT_CASES = [
+    ("SELECT 1; SELECT 2;", ["SELECT 1;", "SELECT 2;"]),
+    # Semicolons inside strings and quoted identifiers
+    ("INSERT INTO t VALUES ('a;b'); SELECT 2;", ["INSERT INTO t VALUES ('a;b');", "SELECT 2;"]),
+    ('SELECT "x;y" FROM `we;ird`; SELECT 2;', ['SELECT "x;y" FROM `we;ird`;', "SELECT 2;"]),
+    # Doubled and backslash-escaped quotes
+    ("INSERT INTO t VALUES ('it''s; fine');", ["INSERT INTO t VALUES ('it''s; fine');"]),
+    (r"INSERT INTO t VALUES ('a\';b'); SELECT 2;", [r"INSERT INTO t VALUES ('a\';b');", "SELECT 2;"]),
+    (r'SELECT "say \"hi;\"";', [r'SELECT "say \"hi;\"";']),
+    # Comments: leading ones are dropped, a ';' inside one never ends a statement
+    ("-- setup; not a statement\nSELECT 1;", ["SELECT 1;"]),
+    ("/* a; b */ SELECT 1; SELECT /* ; */ 2;", ["SELECT 1;", "SELECT /* ; */ 2;"]),
+    ("SELECT 1 -- trailing; comment\n;", ["SELECT 1 -- trailing; comment\n;"]),
+    # MySQL version comments are executable and kept
+    ("/*!40101 SET NAMES utf8 */;", ["/*!40101 SET NAMES utf8 */;"]),
+    # Division and minus aren't comments
+    ("SELECT 4/2, 3-1;", ["SELECT 4/2, 3-1;"]),
+    # Empty statements are skipped, an unterminated tail is still returned
+    ("SELECT 1;;\n; SELECT 2", ["SELECT 1;", "SELECT 2"]),
+]
+
+@pytest.fixture
+def import_manager():
+    db_connector = DBConnector()
+    db_connector.engine = create_engine("sqlite://", poolclass=StaticPool)
+    yield ImportManager(db_connector)
+    db_connector.engine.dispose()
+
+def _chunks(sql, size):
+    return [sql[i:i + size] for i in range(0, len(sql), size)]
+
+@pytest.mark.parametrize("sql, expected", SPLIT_CASES)
+def test_split_statements(import_manager, sql, expected):
+    assert list(import_manager._iter_sql_statements([sql])) == expected
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+@pytest.mark.parametrize("sql, expected", SPLIT_CASES)
+def test_split_statements_across_chunks(import_manager, sql, expected, size):
+    # Every chunk boundary, including inside strings and comments
+    assert list(import_manager._iter_sql_statements(_chunks(sql, size))) == expected
+
+def test_import_sql_stream(import_manager):
+    dump = (
+        "-- Table structure\n"
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT);\n"
+        "INSERT INTO notes (id, body) VALUES (1, 'one; two');\n"
+        "INSERT INTO notes (id, body) VALUES (2, 'it''s\n"
+        "multi-line; café');\n"
+    )
+
+    result = import_manager.import_sql_stream(io.BytesIO(dump.encode("utf-8")))
+
+    assert result["success"]
+    assert result["statements_executed"] == 3
+    with import_manager.db_connector.engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, body FROM notes ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, "one; two"), (2, "it's\nmulti-line; café")]
+
+def test_failed_insert_batch_replays_statements(import_manager):
+    with import_manager.db_connector.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)"))
+    dump = (
+        "INSERT INTO notes (id, body) VALUES (1, 'a');\n"
+        "INSERT INTO notes (id, body) VALUES (2, 'b');\n"
+        "INSERT INTO notes (id, body) VALUES (1, 'duplicate');\n"
+        "INSERT INTO notes (id, body) VALUES (3, 'c');\n"
+    )
+
+    result = import_manager.import_sql(dump)
+
+    # The merged INSERT fails on the duplicate key and is rolled back; the
+    # replay keeps every other row and reports just the bad one
+    assert result["success"]
+    assert result["statements_executed"] == 3
+    assert result["warning_count"] == 1
+    assert "'duplicate'" in result["warnings"][0]
+    with import_manager.db_connector.engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, body FROM notes ORDER BY id")).all()
+    assert [tuple(row) for row in rows] == [(1, "a"), (2, "b"), (3, "c")]
+
+def test_long_statement_is_scanned_once(import_manager, monkeypatch):
+    # One INSERT over many lines, each with ';' inside its strings: every
+    # line triggers a scan, but each resumes where the previous one stopped
+    lines = ["INSERT INTO t VALUES\n"]
+    lines += [f"({i}, 'a;b;c', 'x; y'),\n" for i in range(2000)]
+    lines.append("(2000, 'end;', '');\n")
+    sql = "".join(lines)
+
+    scanned = []
+    class CountingRe:
+        def match(self, data, pos):
+            scanned.append(len(data) - pos)
+            return _TOKENS_RE.match(data, pos)
+    monkeypatch.setattr("import_manager._TOKENS_RE", CountingRe())
+
+    assert list(import_manager._iter_sql_statements(lines)) == [sql.strip()]
+    assert sum(scanned) < 2 * len(sql)
@@ -0,0 +1,103 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from unittest.mock import patch, AsyncMock
+
+@pytest.fixture(scope="module")
+def client():
+    # Built once for the module; tests share it
+    return TestClient(app)
+
+def test_health_check(client):
+    response = client.get('/api/health')
+    assert response.status_code == 200
+    assert response.json()['status'] == "ok"
+
+@patch('main.db_connector.is_connected', return_value=False)
+def test_requires_connection(mock_connected, client):
+    response = client.post('/api/query/execute', json={"sql": "SELECT 1"})
+    assert response.status_code == 401
+    assert response.json()['code'] == "DB_NOT_CONNECTED"
+
+@patch('main.llm_generator.agenerate_sql', new_callable=AsyncMock)
+@patch('main.schema_inspector.get_schema_summary')
+@patch('main.db_connector.is_connected', return_value=True)
+def test_generate_query(mock_connected, mock_get_schema, mock_generate, client):
+    mock_get_schema.return_value = "Table: users, Columns: id, name"
+    mock_generate.return_value = {
+        "sql": "SELECT * FROM users",
+        "explanation": "Selects all users",
+        "confidence": "high"
+    }
+
+    response = client.post('/api/query/generate', json={"question": "Show all users"})
+
+    assert response.status_code == 200
+    assert response.json()['sql'] == "SELECT * FROM users"
+
+@patch('main.db_connector.is_connected', return_value=True)
+def test_generate_query_requires_question(mock_connected, client):
+    response = client.post('/api/query/generate', json={})
+    assert response.status_code == 400
+
+@patch('main.query_executor.execute_and_log')
+@patch('main.db_connector.is_connected', return_value=True)
+def test_execute_query(mock_connected, mock_execute, client):
+    mock_execute.return_value = {
+        "success": True,
+        "rows": [{"id": 1, "name": "Alice"}],
+        "columns": ["id", "name"],
+        "row_count": 1,
+        "execution_time_ms": 10
+    }
+
+    response = client.post('/api/query/execute?format=columnar',
+                           json={"sql": "SELECT * FROM users", "question": "Show all users"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data['success']
+    assert len(data['rows']) == 1
+    mock_execute.assert_called_once_with("SELECT * FROM users", "Show all users", False, True)
+
+@patch('main.query_executor.execute_and_log')
+@patch('main.db_connector.is_connected', return_value=True)
+def test_execute_query_failure(mock_connected, mock_execute, client):
+    mock_execute.return_value = {"success": False, "error": "syntax error"}
+
+    response = client.post('/api/query/execute', json={"sql": "SELEC 1"})
+    assert response.status_code == 400
+    assert response.json()['error'] == "syntax error"
+
+@patch('main.table_manager.get_table_data')
+@patch('main.db_connector.get_key_column', return_value="id")
+@patch('main.db_connector.is_connected', return_value=True)
+def test_table_data(mock_connected, mock_get_pk, mock_get_data, client):
+    mock_get_data.return_value = {
+        "success": True,
+        "columns": ["id", "name"],
+        "rows": [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bob"}],
+        "pagination": {"page": 1, "per_page": 2, "next_cursor": 2, "prev_cursor": None}
+    }
+
+    response = client.get('/api/tables/users/data',
+                          params={"per_page": 2, "after": "0", "name": "LIKE %a%", "t": "123"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [row['name'] for row in data['rows']] == ["Alice", "Bob"]
+    assert data['pagination']['next_cursor'] == 2
+    mock_get_data.assert_called_once_with(
+        "users", 1, 2, None, 'asc', {"name": "LIKE %a%"},
+        key_column="id", after="0", before=None, columnar=False, word_search=False
+    )
+
+@patch('main.table_manager.get_table_data')
+@patch('main.db_connector.get_key_column', return_value=None)
+@patch('main.db_connector.is_connected', return_value=True)
+def test_table_data_failure(mock_connected, mock_get_pk, mock_get_data, client):
+    mock_get_data.return_value = {"success": False, "error": "Unknown table: nope"}
+
+    response = client.get('/api/tables/nope/data')
+    assert response.status_code == 400
+    assert response.json()['error'] == "Unknown table: nope"
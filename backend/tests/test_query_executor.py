@@ -0,0 +1,29 @@
+import queue
+import pytest
+from unittest.mock import MagicMock, patch
+from config import Config
+from query_executor import QueryExecutor
+
+@pytest.fixture
+def query_executor(tmp_path):
+    with patch.object(Config, "APP_DB_PATH", str(tmp_path / "app.db")):
+        yield QueryExecutor(MagicMock())
+
+def test_history_includes_query_just_logged(query_executor):
+    for i in range(50):
+        query_executor._log_query(f"question {i}", f"SELECT {i}", "success", 1.0, 1, None)
+
+    history = query_executor.get_history(limit=1)
+    assert history[0]["sql"] == "SELECT 49"
+    assert len(query_executor.get_history(limit=100)) == 50
+
+@patch("query_executor.HISTORY_PUT_TIMEOUT", 0.01)
+@patch("query_executor.HISTORY_FLUSH_TIMEOUT", 0.01)
+def test_full_writer_queue_writes_inline(query_executor):
+    # A queue nobody drains stands in for a writer that can't keep up
+    stalled = queue.Queue(maxsize=1)
+    stalled.put(("stalled", "SELECT 0", "success", 1.0, 1, None))
+    query_executor._log_queue = stalled
+
+    query_executor._log_query("overflow", "SELECT 1", "success", 1.0, 1, None)
+    assert [entry["sql"] for entry in query_executor.get_history()] == ["SELECT 1"]
@@ -0,0 +1,36 @@
+import pytest
+from safety_validator import SafetyValidator
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM t",
+    "  \n\tselect id FROM t",
+    "SELECT*FROM t",
+    "select(1)",
+    "WITH x AS (SELECT 1) SELECT * FROM x",
+    "EXPLAIN SELECT * FROM t",
+    "SHOW TABLES",
+    "DESCRIBE t",
+    # Keywords only count as whole words
+    "SELECT updated_at, created_by FROM t",
+])
+def test_allows_read_only(sql):
+    is_safe, reason = SafetyValidator.validate(sql)
+    assert is_safe, reason
+
+@pytest.mark.parametrize("sql", [
+    "",
+    "   ",
+    "SELECT_x FROM t",
+    "SELECTION FROM t",
+    "1; SELECT 1",
+    "(SELECT 1)",
+    "VALUES (1)",
+    "DROP TABLE t",
+    "SELECT * FROM t; DELETE FROM t",
+    "select * into   outfile '/tmp/x' from t",
+    "SELECT load_file('/etc/passwd')",
+    "update t set a = 1",
+])
+def test_denies(sql):
+    is_safe, _ = SafetyValidator.validate(sql)
+    assert not is_safe
@@ -0,0 +1,163 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import StaticPool
+from db_connector import DBConnector
+from table_manager import TableManager
+
+ROWS = 120
+
+@pytest.fixture
+def table_manager():
+    # SQLite accepts the backtick quoting the MySQL code paths write
+    db_connector = DBConnector()
+    db_connector.engine = create_engine("sqlite://", poolclass=StaticPool)
+    db_connector.db_type = "mysql"
+    with db_connector.engine.begin() as conn:
+        conn.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO users VALUES (:id, :name)"),
+                     [{"id": i, "name": f"user{i}"} for i in range(1, ROWS + 1)])
+        conn.execute(text("UPDATE users SET name = 'Alice Smith' WHERE id = 1"))
+    # SQLite has no catalog row estimates, so counts are always exact
+    with patch.object(TableManager, "_column_names", return_value=frozenset({"id", "name"})), \
+            patch.object(TableManager, "_approximate_count", return_value=None):
+        yield TableManager(db_connector)
+    db_connector.engine.dispose()
+
+def test_contains_filter_keeps_substring_semantics(table_manager):
+    with patch.object(TableManager, "_search_columns", return_value=frozenset({"name"})):
+        result = table_manager.get_table_data("users", filters={"name": "LIKE %lice%"})
+    assert result["success"]
+    assert "MATCH" not in result["sql_query"]
+    assert [row["id"] for row in result["rows"]] == [1]
+
+def test_word_search_uses_fulltext_index(table_manager):
+    statements = []
+    event.listen(table_manager.db_connector.engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    with patch.object(TableManager, "_search_columns", return_value=frozenset({"name"})):
+        # SQLite has no MATCH ... AGAINST, so only the statement is checked
+        table_manager.get_table_data("users", filters={"name": "LIKE %alice%"}, word_search=True)
+    assert any("MATCH(`name`) AGAINST" in statement for statement in statements)
+
+def _page(table_manager, **kwargs):
+    result = table_manager.get_table_data("users", per_page=50, key_column="id", **kwargs)
+    assert result["success"], result.get("error")
+    pagination = result["pagination"]
+    return [row["id"] for row in result["rows"]], pagination["prev_cursor"], pagination["next_cursor"]
+
+def test_keyset_pages_forward(table_manager):
+    ids, prev_cursor, next_cursor = _page(table_manager)
+    assert ids == list(range(1, 51))
+    assert (prev_cursor, next_cursor) == (None, 50)
+
+    ids, prev_cursor, next_cursor = _page(table_manager, page=2, after=next_cursor)
+    assert ids == list(range(51, 101))
+    assert (prev_cursor, next_cursor) == (51, 100)
+
+    ids, prev_cursor, next_cursor = _page(table_manager, page=3, after=next_cursor)
+    assert ids == list(range(101, ROWS + 1))
+    assert (prev_cursor, next_cursor) == (101, None)
+
+def test_keyset_pages_backward(table_manager):
+    ids, prev_cursor, next_cursor = _page(table_manager, page=2, before=101)
+    assert ids == list(range(51, 101))
+    assert (prev_cursor, next_cursor) == (51, 100)
+
+    ids, prev_cursor, next_cursor = _page(table_manager, page=1, before=prev_cursor)
+    assert ids == list(range(1, 51))
+    assert (prev_cursor, next_cursor) == (None, 50)
+
+def test_keyset_full_page_at_either_end_has_no_further_cursor(table_manager):
+    # Exactly per_page rows left: no cursor to an empty page
+    ids, _, next_cursor = _page(table_manager, after=ROWS - 50)
+    assert ids == list(range(ROWS - 49, ROWS + 1))
+    assert next_cursor is None
+
+    # A full page read backward that reaches the first row
+    ids, prev_cursor, next_cursor = _page(table_manager, before=51)
+    assert ids == list(range(1, 51))
+    assert (prev_cursor, next_cursor) == (None, 50)
+
+def test_keyset_cursors_in_columnar_rows(table_manager):
+    result = table_manager.get_table_data("users", per_page=50, key_column="id", after=50, columnar=True)
+    assert result["rows"][0] == (51, "user51")
+    assert result["pagination"]["next_cursor"] == 100
+
+def _user_names(table_manager, ids):
+    with table_manager.db_connector.engine.connect() as conn:
+        rows = conn.execute(text(f"SELECT id, name FROM users WHERE id IN ({', '.join(map(str, ids))})")).all()
+    return dict(rows)
+
+def test_insert_rows_in_batches(table_manager, monkeypatch):
+    monkeypatch.setattr("table_manager.INSERT_BATCH_ROWS", 2)
+    rows = [{"id": 1000 + i, "name": f"new{i}"} for i in range(5)]
+    # Columns a row leaves out are NULL
+    rows.append({"id": 1005})
+
+    result = table_manager.insert_rows("users", rows)
+
+    assert result["success"], result.get("error")
+    assert result["rows_inserted"] == 6
+    assert _user_names(table_manager, range(1000, 1006)) == {
+        1000: "new0", 1001: "new1", 1002: "new2", 1003: "new3", 1004: "new4", 1005: None
+    }
+
+def test_insert_rows_copy_path_commits(table_manager, monkeypatch):
+    # COPY writes through the raw DBAPI cursor, outside SQLAlchemy's view;
+    # a plain executemany on that cursor stands in for it on SQLite
+    def copy_rows(self, conn, table_name, columns, rows):
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.executemany("INSERT INTO users (id, name) VALUES (?, ?)",
+                               [(row["id"], row["name"]) for row in rows])
+        finally:
+            cursor.close()
+    monkeypatch.setattr(TableManager, "_copy_rows", copy_rows)
+    monkeypatch.setattr("table_manager.COPY_MIN_ROWS", 3)
+    table_manager.db_connector.db_type = "postgresql"
+
+    rows = [{"id": 2000 + i, "name": f"copied{i}"} for i in range(3)]
+    result = table_manager.insert_rows("users", rows)
+
+    assert result["success"], result.get("error")
+    assert _user_names(table_manager, range(2000, 2003)) == {2000: "copied0", 2001: "copied1", 2002: "copied2"}
+
+def test_insert_rows_rolls_back_on_failure(table_manager):
+    # The second row repeats an existing key
+    result = table_manager.insert_rows("users", [{"id": 3000, "name": "x"}, {"id": 1, "name": "dup"}])
+
+    assert not result["success"]
+    assert _user_names(table_manager, [3000]) == {}
+
+def test_batch_mutate(table_manager):
+    result = table_manager.batch_mutate([
+        {"op": "insert", "table": "users", "data": {"id": 4000, "name": "batch"}},
+        {"op": "update", "table": "users", "pk_column": "id", "pk_value": 2, "data": {"name": "renamed"}},
+        {"op": "delete", "table": "users", "pk_column": "id", "pk_value": 3},
+    ])
+
+    assert result["success"], result.get("error")
+    assert _user_names(table_manager, [2, 3, 4000]) == {2: "renamed", 4000: "batch"}
+
+def test_batch_mutate_rolls_back_on_failure(table_manager):
+    result = table_manager.batch_mutate([
+        {"op": "update", "table": "users", "pk_column": "id", "pk_value": 2, "data": {"name": "renamed"}},
+        {"op": "insert", "table": "users", "data": {"id": 1, "name": "dup"}},
+    ])
+
+    assert not result["success"]
+    assert _user_names(table_manager, [2]) == {2: "user2"}
+
+def test_filtered_count_cache_keys_on_where_clause(table_manager):
+    # Same filter, rendered as two different conditions (as LIKE and
+    # word_search MATCH are): neither count may stand in for the other
+    filters = {"name": "LIKE %user1%"}
+    with table_manager.db_connector.engine.connect() as conn:
+        like = table_manager._exact_count(
+            conn, "users", "WHERE `name` LIKE :f0", {"f0": "%user1%"}, filters)
+        exact = table_manager._exact_count(
+            conn, "users", "WHERE `name` = :f0", {"f0": "user10"}, filters)
+    assert like == 31
+    assert exact == 1
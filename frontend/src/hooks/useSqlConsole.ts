@@ -42,7 +42,8 @@ export function useSqlConsole() {
                     const newRows = [...prev.rows, ...message.payload.rows];
                     return {
                         ...prev,
-                        columns: message.payload.columns, // Update columns just in case
+                        // Only a query's first chunk carries the columns
+                        columns: message.payload.columns ?? prev.columns,
                         rows: newRows,
                         loadedRows: newRows.length
                     };
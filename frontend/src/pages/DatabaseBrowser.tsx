@@ -4,7 +4,7 @@ import { Database, Table, Columns, RefreshCw, ChevronLeft, ChevronRight, Plus, T
 
 import { message } from 'antd';
 import { dbApi, tableApi } from '../services/api';
-import type { TableInfo, TableDataResponse, ColumnInfo, ConnectionInfo } from '../types';
+import type { TableInfo, TableDataResponse, ColumnInfo, ConnectionInfo, PageCursor } from '../types';
 
 // Tab Components
 import { StructureTab } from '../components/StructureTab';
@@ -100,6 +100,8 @@ export const DatabaseBrowser: React.FC = () => {
     const [page, setPage] = useState(1);
     const [perPage] = useState(25);
     const [filters, setFilters] = useState<Record<string, string>>({});
+    // Cursor for the page about to load when stepping to an adjacent page
+    const pendingCursor = useRef<PageCursor | null>(null);
 
     // Editing state
     const [editingCell, setEditingCell] = useState<EditingCell | null>(null);
@@ -152,8 +154,9 @@ export const DatabaseBrowser: React.FC = () => {
     // Actually, `loadTableData` is called manually in most cases, but we can have effect for page/filter
     useEffect(() => {
         if (selectedTable && activeTab === 'browse') {
-            loadTableData(selectedTable, page, filters);
+            loadTableData(selectedTable, page, filters, pendingCursor.current ?? undefined);
         }
+        pendingCursor.current = null;
     }, [page, filters]); // Note: don't include selectedTable or activeTab to avoid double-fetch on select
 
     // Sync displayed SQL with fetched data
@@ -181,11 +184,11 @@ export const DatabaseBrowser: React.FC = () => {
         }
     };
 
-    const loadTableData = async (tableName: string, pageNum: number, currentFilters: Record<string, string>) => {
+    const loadTableData = async (tableName: string, pageNum: number, currentFilters: Record<string, string>, cursor?: PageCursor) => {
         setLoading(true);
         setError(null);
         try {
-            const tableDataRes = await tableApi.getTableData(tableName, pageNum, perPage, undefined, 'asc', currentFilters);
+            const tableDataRes = await tableApi.getTableData(tableName, pageNum, perPage, undefined, 'asc', currentFilters, cursor);
 
             if (tableDataRes.success) {
                 setTableData(tableDataRes);
@@ -327,6 +330,21 @@ export const DatabaseBrowser: React.FC = () => {
         }
     };
 
+    // Next / previous seek from the current page's edge rows via keyset
+    // cursors; other jumps (and tables without cursors) page by number
+    const goToPage = (target: number) => {
+        if (target === page) return;
+        const pagination = tableData?.pagination;
+        if (target === page + 1 && pagination?.next_cursor != null) {
+            pendingCursor.current = { after: pagination.next_cursor };
+        } else if (target === page - 1 && pagination?.prev_cursor != null) {
+            pendingCursor.current = { before: pagination.prev_cursor };
+        } else {
+            pendingCursor.current = null;
+        }
+        setPage(target);
+    };
+
     const handleSearchRequest = (newFilters: Record<string, string>) => {
         setFilters(newFilters);
         setPage(1);
@@ -708,7 +726,7 @@ export const DatabaseBrowser: React.FC = () => {
                                 </h2>
                                 {tableData?.pagination && (
                                     <span className="text-xs bg-slate-100 px-2 py-0.5 rounded text-slate-500">
-                                        {tableData.pagination.total_count} rows
+                                        {tableData.pagination.total_count_approximate ? '~' : ''}{tableData.pagination.total_count} rows
                                     </span>
                                 )}
                                 {Object.keys(filters).length > 0 && (
@@ -818,7 +836,7 @@ export const DatabaseBrowser: React.FC = () => {
                                                     <span className="font-bold">✓</span>
                                                     <span>
                                                         Showing rows {Math.min((tableData.pagination.page - 1) * tableData.pagination.per_page + 1, tableData.pagination.total_count)} - {Math.min(tableData.pagination.page * tableData.pagination.per_page, tableData.pagination.total_count)}
-                                                        ({tableData.pagination.total_count} total{showProfiling && tableData.execution_time ? `, Query took ${tableData.execution_time.toFixed(4)} seconds` : ''}.)
+                                                        ({tableData.pagination.total_count_approximate ? '~' : ''}{tableData.pagination.total_count} total{showProfiling && tableData.execution_time ? `, Query took ${tableData.execution_time.toFixed(4)} seconds` : ''}.)
                                                     </span>
                                                 </div>
                                             ) : (
@@ -1400,7 +1418,7 @@ export const DatabaseBrowser: React.FC = () => {
                                                             <span style={{ fontSize: '10px' }}>&laquo;</span>
                                                         </button>
                                                         <button
-                                                            onClick={() => setPage(p => Math.max(1, p - 1))}
+                                                            onClick={() => goToPage(Math.max(1, page - 1))}
                                                             disabled={page === 1}
                                                             className="p-1 border rounded hover:bg-white disabled:opacity-50 text-slate-500"
                                                             title="Previous Page"
@@ -1421,7 +1439,7 @@ export const DatabaseBrowser: React.FC = () => {
                                                                 return (
                                                                     <button
                                                                         key={p}
-                                                                        onClick={() => setPage(p)}
+                                                                        onClick={() => goToPage(p)}
                                                                         disabled={p === page}
                                                                         className={`w-8 h-8 flex items-center justify-center rounded border text-sm transition-colors ${p === page
                                                                             ? 'bg-primary-600 text-white border-primary-600 font-medium'
@@ -1435,7 +1453,7 @@ export const DatabaseBrowser: React.FC = () => {
                                                         </div>
 
                                                         <button
-                                                            onClick={() => setPage(p => Math.min(tableData?.pagination?.total_pages || 1, p + 1))}
+                                                            onClick={() => goToPage(Math.min(tableData?.pagination?.total_pages || 1, page + 1))}
                                                             disabled={page === (tableData?.pagination?.total_pages || 1)}
                                                             className="p-1 border rounded hover:bg-white disabled:opacity-50 text-slate-500"
                                                             title="Next Page"
@@ -1,5 +1,5 @@
 import axios from 'axios';
-import type { ConnectResponse, ExecuteResponse, GenerateResponse, QueryHistoryItem, TablesResponse, TableStructureResponse, TableDataResponse, DatabasesResponse } from '../types';
+import type { ConnectResponse, ExecuteResponse, GenerateResponse, QueryHistoryItem, TablesResponse, TableStructureResponse, TableDataResponse, DatabasesResponse, PageCursor } from '../types';
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
@@ -26,6 +26,15 @@ api.interceptors.response.use(
     }
 );
 
+const zipRows = (columns: string[], rows: any[][]): Record<string, any>[] =>
+    rows.map((values) => {
+        const row: Record<string, any> = {};
+        for (let i = 0; i < columns.length; i++) {
+            row[columns[i]] = values[i];
+        }
+        return row;
+    });
+
 export const dbApi = {
     checkHealth: async () => {
         return api.get('/health');
@@ -84,8 +93,16 @@ export const dbApi = {
 
     executeQuery: async (sql: string, question?: string, profile?: boolean): Promise<ExecuteResponse> => {
         try {
-            const response = await api.post('/query/execute', { sql, question, profile });
-            return response.data;
+            // Rows come over the wire as value arrays (column names sent once)
+            // and are rebuilt into objects here for the result views
+            const response = await api.post('/query/execute', { sql, question, profile }, {
+                params: { format: 'columnar' },
+            });
+            const data = response.data;
+            if (data.success && data.columns && data.rows) {
+                data.rows = zipRows(data.columns, data.rows);
+            }
+            return data;
         } catch (error: any) {
             return error.response?.data || { success: false, error: 'Execution failed' };
         }
@@ -128,15 +145,29 @@ export const tableApi = {
         perPage: number = 25,
         orderBy?: string,
         orderDir: 'asc' | 'desc' = 'asc',
-        filters?: Record<string, string>
+        filters?: Record<string, string>,
+        cursor?: PageCursor
     ): Promise<TableDataResponse> => {
         try {
             const params: any = { page, per_page: perPage, order_by: orderBy, order_dir: orderDir };
             if (filters) {
                 Object.assign(params, filters);
             }
+            // A cursor seeks from the neighbouring page's edge row; page is
+            // then only echoed back for display
+            if (cursor?.after != null) {
+                params.after = cursor.after;
+            } else if (cursor?.before != null) {
+                params.before = cursor.before;
+            }
+            // Rows come as value arrays, as for executeQuery
+            params.format = 'columnar';
             const response = await api.get(`/tables/${tableName}/data`, { params });
-            return response.data;
+            const data = response.data;
+            if (data.success && data.columns && data.rows) {
+                data.rows = zipRows(data.columns, data.rows);
+            }
+            return data;
         } catch (error: any) {
             return { success: false, error: error.response?.data?.error || 'Failed to fetch data' };
         }
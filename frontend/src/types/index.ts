@@ -59,7 +59,9 @@ export interface QueryHistoryItem {
 // Table Management Types
 export interface TableInfo {
     name: string;
-    column_count: number;
+    // Estimated rows; column_count and primary_keys are only in the structure
+    row_count: number | null;
+    column_count: number | null;
     primary_keys: string[];
 }
 
@@ -105,6 +107,16 @@ export interface PaginationInfo {
     per_page: number;
     total_count: number;
     total_pages: number;
+    total_count_approximate?: boolean;
+    // Keyset cursors (tables with a single-column primary key): pass back as
+    // after / before to fetch the next / previous page
+    next_cursor?: string | number | null;
+    prev_cursor?: string | number | null;
+}
+
+export interface PageCursor {
+    after?: string | number;
+    before?: string | number;
 }
 
 export interface TableDataResponse {